@@ -0,0 +1,325 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pin-level Python models for the femtoRV Tiny Tapeout test bench.
+
+Replaces the Verilog spiflash / FRAM_SPI models of femtoRV_ASIC_Flow/sim with
+fast Python equivalents driven from a single watcher on uo_out:
+
+  * SpiFlash - command 0x03 read, preloaded from firmware_flash.hex. Like
+    sim/cores/sim_spi_flash/spiflash.v it samples MOSI on the falling SPI
+    clock edge and drives MISO with the buffer MSB *before* shifting.
+  * SpiRam   - commands 0x03 read / 0x02 write with a 24-bit address, mode 0
+    (sample on rising edge, shift out on falling edge) like FRAM_SPI.
+  * Uart     - decodes TXD (uo_out[7]) and drives RXD (ui_in[2]).
+  * Profiler - attributes cycles to firmware routines from the flash read
+    addresses: the core has no cache, so every instruction fetch is visible
+    on the SPI flash pins, in RTL and gate level alike.
+"""
+
+import re
+from pathlib import Path
+
+import cocotb
+from cocotb.simtime import get_sim_time
+from cocotb.triggers import Event, Timer, with_timeout
+
+# Pin mapping (see info.yaml / src/project.v)
+UI_SPI_MISO = 0
+UI_SPI_MISO_RAM = 1
+UI_RXD = 2
+UO_SPI_MOSI = 0
+UO_SPI_MOSI_RAM = 1
+UO_SPI_CS_N = 2
+UO_SPI_CS_N_RAM = 3
+UO_SPI_CLK_RAM = 4
+UO_SPI_CLK = 5
+UO_LEDS = 6
+UO_TXD = 7
+
+# peripheral_uart in femto.v: clk_freq=27 MHz, baud=115200. uart.v reloads its
+# enable16 counter with divisor-2, so one bit lasts 16 * (divisor - 1) clocks.
+UART_BIT_CYCLES = 16 * (27000000 // 115200 // 16 - 1)
+
+FIRMWARE_DIR = Path(__file__).resolve().parents[2] / "femtoRV_ASIC_Flow" / "firmware" / "asm"
+
+
+# ---------- firmware files ----------
+def load_verilog_hex(path):
+    """Bytes of an `objcopy -O verilog` file (@address records + hex bytes)."""
+    memory = bytearray()
+    addr = 0
+    for token in Path(path).read_text().split():
+        if token.startswith("@"):
+            addr = int(token[1:], 16)
+            continue
+        if addr >= len(memory):
+            memory.extend(b"\x00" * (addr + 1 - len(memory)))
+        memory[addr] = int(token, 16)
+        addr += 1
+    return memory
+
+
+def load_routines(lst_path, map_path):
+    """
+    [(start, end, name)] for every label inside a .text section.
+
+    Text ranges come from the linker map, labels from the objdump listing;
+    local labels (.L*, .PC0) belong to the enclosing routine.
+    """
+    text = []
+    for m in re.finditer(r"^ \.text\s+0x([0-9a-f]+)\s+0x([0-9a-f]+)", Path(map_path).read_text(), re.M):
+        start, size = int(m.group(1), 16), int(m.group(2), 16)
+        if size:
+            text.append((start, start + size))
+
+    labels = []
+    for m in re.finditer(r"^([0-9a-f]{8}) <([^>]+)>:", Path(lst_path).read_text(), re.M):
+        addr, name = int(m.group(1), 16), m.group(2)
+        if not name.startswith(".") and any(lo <= addr < hi for lo, hi in text):
+            labels.append((addr, name))
+    labels.sort()
+
+    routines = []
+    for i, (addr, name) in enumerate(labels):
+        section_end = next(hi for lo, hi in text if lo <= addr < hi)
+        end = labels[i + 1][0] if i + 1 < len(labels) else section_end
+        routines.append((addr, min(end, section_end), name))
+    return routines
+
+
+# ---------- SPI memories ----------
+class SpiFlash:
+    """Read-only SPI flash (command 0x03), mirrors spiflash.v in mode_spi."""
+
+    def __init__(self, memory, on_read=None):
+        self.memory = memory
+        self.on_read = on_read
+        self.reads = 0
+        self.deselect()
+
+    def deselect(self):
+        self.buffer = 0
+        self.bitcount = 0
+        self.bytecount = 0
+        self.cmd = 0
+        self.addr = 0
+
+    def falling(self, mosi):
+        """SPI clock falling edge with CS low; returns the new MISO level."""
+        miso = (self.buffer >> 7) & 1
+        self.buffer = ((self.buffer << 1) | mosi) & 0xFF
+        self.bitcount += 1
+        if self.bitcount == 8:
+            self.bitcount = 0
+            self.bytecount += 1
+            self._action()
+        return miso
+
+    def _action(self):
+        if self.bytecount == 1:
+            self.cmd = self.buffer
+        elif self.cmd == 0x03 and self.bytecount <= 4:
+            self.addr = ((self.addr << 8) | self.buffer) & 0xFFFFFF
+            if self.bytecount == 4:
+                self.reads += 1
+                if self.on_read is not None:
+                    self.on_read(self.addr)
+        if self.cmd == 0x03 and self.bytecount >= 4:
+            self.buffer = self.memory[self.addr] if self.addr < len(self.memory) else 0
+            self.addr += 1
+
+
+class SpiRam:
+    """SPI RAM with 24-bit addresses: 0x02 write, 0x03 read (mode 0)."""
+
+    def __init__(self, size=64 * 1024):
+        self.memory = bytearray(size)
+        self.reads = 0
+        self.writes = 0
+        self.deselect()
+
+    def deselect(self):
+        self.shift_in = 0
+        self.bitcount = 0
+        self.cmd = 0
+        self.addr = 0
+        self.shift_out = 0
+        self.out_bits = 0
+
+    def rising(self, mosi):
+        self.shift_in = ((self.shift_in << 1) | mosi) & 0xFF
+        self.bitcount += 1
+        if self.bitcount % 8:
+            return
+        nbyte = self.bitcount // 8
+        if nbyte == 1:
+            self.cmd = self.shift_in
+        elif nbyte <= 4:
+            self.addr = ((self.addr << 8) | self.shift_in) & 0xFFFFFF
+            if nbyte == 4:
+                if self.cmd == 0x03:
+                    self.reads += 1
+                elif self.cmd == 0x02:
+                    self.writes += 1
+        elif self.cmd == 0x02:
+            self.memory[self.addr % len(self.memory)] = self.shift_in
+            self.addr += 1
+
+    def falling(self):
+        """Returns the new MISO level, or None when not sending data."""
+        if self.cmd != 0x03 or self.bitcount < 32:
+            return None
+        if self.out_bits == 0:
+            self.shift_out = self.memory[self.addr % len(self.memory)]
+            self.addr += 1
+            self.out_bits = 8
+        self.out_bits -= 1
+        return (self.shift_out >> self.out_bits) & 1
+
+
+# ---------- profiler ----------
+class Profiler:
+    """Per-routine cycle and call counts from the flash fetch addresses."""
+
+    def __init__(self, routines, clk_period_ns):
+        self.routines = routines
+        self.clk_period_ns = clk_period_ns
+        self.cycles = {name: 0.0 for _, _, name in routines}
+        self.calls = {name: 0 for _, _, name in routines}
+        self._entry = {start: name for start, _, name in routines}
+        self._current = None
+        self._since = 0.0
+
+    def _lookup(self, addr):
+        for start, end, name in self.routines:
+            if start <= addr < end:
+                return name
+        return None
+
+    def fetch(self, addr):
+        now = get_sim_time("ns")
+        name = self._lookup(addr)
+        if name is None:
+            return  # data read (.data strings) keeps the current routine
+        if self._current is not None:
+            self.cycles[self._current] += (now - self._since) / self.clk_period_ns
+        if addr in self._entry:
+            self.calls[name] += 1
+        self._current = name
+        self._since = now
+
+    def snapshot(self):
+        return dict(self.cycles), dict(self.calls)
+
+    def report(self, log, since=None, title="Firmware profile"):
+        cycles, calls = self.snapshot()
+        if since is not None:
+            cycles = {k: v - since[0].get(k, 0.0) for k, v in cycles.items()}
+            calls = {k: v - since[1].get(k, 0) for k, v in calls.items()}
+        total = sum(cycles.values()) or 1.0
+        log.info(f"{title}: {total:.0f} cycles")
+        for name, cyc in sorted(cycles.items(), key=lambda kv: -kv[1]):
+            if cyc or calls[name]:
+                log.info(f"  {name:<12} {calls[name]:>6} calls {cyc:>12.0f} cycles {100 * cyc / total:6.1f} %")
+        return cycles, calls
+
+
+# ---------- UART ----------
+class Uart:
+    """TXD decoder (fed by the pin watcher) and RXD driver."""
+
+    def __init__(self, board, clk_period_ns, bit_cycles=UART_BIT_CYCLES):
+        self.board = board
+        self.bit_ns = bit_cycles * clk_period_ns
+        self.received = bytearray()
+        self._busy = False
+        self._event = Event()
+
+    def txd_falling(self):
+        if not self._busy:
+            self._busy = True
+            cocotb.start_soon(self._receive())
+
+    async def _receive(self):
+        await Timer(self.bit_ns * 1.5, unit="ns")
+        byte = 0
+        for i in range(8):
+            byte |= self.board.uo_bit(UO_TXD) << i
+            await Timer(self.bit_ns, unit="ns")
+        # now in the middle of the stop bit
+        self._busy = False
+        self.received.append(byte)
+        self._event.set()
+
+    async def read_until(self, suffix, timeout_ns):
+        """Wait until the received text ends with `suffix`; returns and clears it."""
+        suffix = suffix.encode() if isinstance(suffix, str) else suffix
+        while not self.received.endswith(suffix):
+            self._event.clear()
+            await with_timeout(self._event.wait(), timeout_ns, "ns")
+        text = bytes(self.received).decode(errors="replace")
+        self.received.clear()
+        return text
+
+    async def send(self, data):
+        for byte in data.encode() if isinstance(data, str) else data:
+            self.board.set_ui(UI_RXD, 0)
+            await Timer(self.bit_ns, unit="ns")
+            for i in range(8):
+                self.board.set_ui(UI_RXD, (byte >> i) & 1)
+                await Timer(self.bit_ns, unit="ns")
+            self.board.set_ui(UI_RXD, 1)
+            await Timer(self.bit_ns, unit="ns")
+
+
+# ---------- board ----------
+class Board:
+    """Owns ui_in and dispatches every uo_out change to the models."""
+
+    def __init__(self, dut, flash_image, clk_period_ns, routines=()):
+        self.dut = dut
+        self.ui = 1 << UI_RXD  # UART line idles high
+        self.uo = 0
+        self.profiler = Profiler(list(routines), clk_period_ns)
+        self.flash = SpiFlash(flash_image, on_read=self.profiler.fetch)
+        self.ram = SpiRam()
+        self.uart = Uart(self, clk_period_ns)
+        dut.ui_in.value = self.ui
+
+    def set_ui(self, bit, level):
+        self.ui = (self.ui & ~(1 << bit)) | (level << bit)
+        self.dut.ui_in.value = self.ui
+
+    def uo_bit(self, bit):
+        return (self.uo >> bit) & 1
+
+    def start(self):
+        return cocotb.start_soon(self._watch())
+
+    async def _watch(self):
+        while True:
+            await self.dut.uo_out.value_change
+            new = self.dut.uo_out.value.resolve("zeros").to_unsigned()
+            old, self.uo = self.uo, new
+            changed = old ^ new
+
+            if changed & (1 << UO_SPI_CS_N) and new & (1 << UO_SPI_CS_N):
+                self.flash.deselect()
+            elif changed & (1 << UO_SPI_CLK) and not new & (1 << UO_SPI_CLK) and not new & (1 << UO_SPI_CS_N):
+                miso = self.flash.falling((new >> UO_SPI_MOSI) & 1)
+                if miso != (self.ui >> UI_SPI_MISO) & 1:
+                    self.set_ui(UI_SPI_MISO, miso)
+
+            if changed & (1 << UO_SPI_CS_N_RAM) and new & (1 << UO_SPI_CS_N_RAM):
+                self.ram.deselect()
+            elif changed & (1 << UO_SPI_CLK_RAM) and not new & (1 << UO_SPI_CS_N_RAM):
+                if new & (1 << UO_SPI_CLK_RAM):
+                    self.ram.rising((new >> UO_SPI_MOSI_RAM) & 1)
+                else:
+                    miso = self.ram.falling()
+                    if miso is not None and miso != (self.ui >> UI_SPI_MISO_RAM) & 1:
+                        self.set_ui(UI_SPI_MISO_RAM, miso)
+
+            if changed & (1 << UO_TXD) and not new & (1 << UO_TXD):
+                self.uart.txd_falling()
@@ -0,0 +1,96 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Firmware-driven test of tt_um_femto: boots femtoRV_ASIC_Flow/firmware/asm
+(the UART calculator) from Python SPI flash / RAM models, types operations on
+RXD, checks the decoded TXD answers and reports per-routine cycle counts.
+
+Not part of the default COCOTB_TEST_MODULES, since it runs millions of clock
+cycles. Run it without VCD dumping:
+
+  make -B COCOTB_TEST_MODULES=test_firmware PLUSARGS=-none
+  python ../../tools/cocotb_regress.py . --modules test_firmware --gates both
+
+Environment:
+  FIRMWARE      firmware directory (firmware_flash.hex, firmware.lst, firmware.map)
+  CYCLE_BUDGET  fail if the workload takes more clock cycles than this
+"""
+
+import json
+import os
+from pathlib import Path
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.simtime import get_sim_time
+from cocotb.triggers import ClockCycles
+
+from femto_models import FIRMWARE_DIR, Board, load_routines, load_verilog_hex
+
+CLK_PERIOD_NS = 40
+STEP_TIMEOUT_CYCLES = 500_000
+
+# (typed text, expected answer): calculator.S multiplies two decimal digits
+# and prints the product as four BCD digits
+OPERATIONS = [("8*9", "0072"), ("3*7", "0021"), ("9*9", "0081"), ("0*5", "0000")]
+
+firmware_dir = Path(os.environ.get("FIRMWARE", FIRMWARE_DIR))
+flash_hex = firmware_dir / "firmware_flash.hex"
+
+
+@cocotb.test(skip=not flash_hex.exists())
+async def test_calculator(dut):
+    routines = []
+    if (firmware_dir / "firmware.lst").exists() and (firmware_dir / "firmware.map").exists():
+        routines = load_routines(firmware_dir / "firmware.lst", firmware_dir / "firmware.map")
+    board = Board(dut, load_verilog_hex(flash_hex), CLK_PERIOD_NS, routines)
+    timeout_ns = STEP_TIMEOUT_CYCLES * CLK_PERIOD_NS
+
+    clock = Clock(dut.clk, CLK_PERIOD_NS, unit="ns")
+    cocotb.start_soon(clock.start())
+    board.start()
+
+    dut.ena.value = 1
+    dut.uio_in.value = 0
+    dut.rst_n.value = 0
+    await ClockCycles(dut.clk, 10)
+    dut.rst_n.value = 1
+    t_boot = get_sim_time("ns")
+
+    prompt = await board.uart.read_until("IN\n", timeout_ns)
+    dut._log.info(f"Boot: {(get_sim_time('ns') - t_boot) / CLK_PERIOD_NS:.0f} cycles, got {prompt!r}")
+    board.profiler.report(dut._log, title="Boot")
+
+    t_start = get_sim_time("ns")
+    profile = {"clk_period_ns": CLK_PERIOD_NS, "operations": []}
+    for text, expected in OPERATIONS:
+        before = board.profiler.snapshot()
+        t0 = get_sim_time("ns")
+        await board.uart.send(text)
+        answer = await board.uart.read_until("\n\r", timeout_ns)
+        assert answer == f"{text}{expected}\n\r", f"{text}: expected {expected!r}, got {answer!r}"
+        await board.uart.read_until("IN\n", timeout_ns)
+
+        cycles, calls = board.profiler.report(dut._log, since=before, title=f"{text}={expected}")
+        profile["operations"].append(
+            {
+                "input": text,
+                "answer": expected,
+                "cycles": round((get_sim_time("ns") - t0) / CLK_PERIOD_NS),
+                "routines": {name: {"calls": calls[name], "cycles": round(cyc)} for name, cyc in cycles.items()},
+            }
+        )
+
+    total = round((get_sim_time("ns") - t_start) / CLK_PERIOD_NS)
+    cycles, calls = board.profiler.report(dut._log, title="Total")
+    profile["total_cycles"] = total
+    profile["flash_reads"] = board.flash.reads
+    profile["ram_reads"] = board.ram.reads
+    profile["ram_writes"] = board.ram.writes
+    profile["routines"] = {name: {"calls": calls[name], "cycles": round(cyc)} for name, cyc in cycles.items()}
+    Path("firmware_profile.json").write_text(json.dumps(profile, indent=2))
+    dut._log.info(f"Workload: {total} cycles ({len(OPERATIONS)} operations), wrote firmware_profile.json")
+
+    budget = os.environ.get("CYCLE_BUDGET")
+    if budget:
+        assert total <= int(budget), f"{total} cycles exceeds CYCLE_BUDGET={budget}"
@@ -0,0 +1,169 @@
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Operand vectors for the 4-bit multiplier (tt_um_mult_4).
+
+The operand space is only 16 x 16 = 256 pairs, so the sweep is exhaustive by
+default. The same vector list drives the cocotb sweep in test.py and can be
+exported as a single GTKWave .tim stimulus (clk, rst_n, init, A[3:0], B[3:0])
+that mult_4_ASIC_Flow/spice/tim_to_cir.py turns into one PWL post-layout run.
+
+Usage:
+  python mult_vectors.py --tim ../../mult_4_ASIC_Flow/spice/tt_um_mult_4_sweep.tim
+  python mult_vectors.py --tim sweep.tim --count 32 --seed 7
+"""
+
+import argparse
+import random
+
+# Pin mapping (see info.yaml / src/project.v)
+A_MASK = 0xF  # ui_in[3:0]
+B_SHIFT = 4  # ui_in[7:4]
+INIT_BIT = 0  # uio_in[0]
+DONE_BIT = 0  # uio_out[0]
+
+# Each operation gets a fixed slot so open-loop (SPICE) stimulus never overlaps;
+# the worst case (B=15) returns to START 26 cycles after init is sampled.
+SLOT_CYCLES = 32
+DONE_HOLD_CYCLES = 10  # END state keeps done high for 10 cycles
+RESET_CYCLES = 2
+INIT_CYCLES = 2
+
+# Same clock as the existing post-layout .cir: 20 ns period, first rise at 10 ns
+CLK_PERIOD_PS = 20000
+TIME_SCALE = 1e-12
+
+
+def golden(a, b):
+    """Expected uo_out for operands a, b."""
+    return (a * b) & 0xFF
+
+
+def done_cycle(b):
+    """
+    Clock cycle (1 = the posedge that samples init) at which done rises.
+
+    Each CHECK/SHIFT iteration consumes one bit of B (plus an ADD cycle when the
+    bit is set) and the FSM leaves the loop one iteration after B reaches zero.
+    """
+    if b == 0:
+        busy = 2
+    else:
+        busy = 2 * (b.bit_length() + 1) + bin(b).count("1")
+    return busy + 2
+
+
+def ui_in_value(a, b):
+    return (a & A_MASK) | ((b & A_MASK) << B_SHIFT)
+
+
+def operand_vectors(count=None, seed=None):
+    """All (A, B) pairs, optionally shuffled (seed) and/or truncated (count)."""
+    vectors = [(a, b) for a in range(16) for b in range(16)]
+    if seed is not None:
+        random.Random(seed).shuffle(vectors)
+    if count is not None:
+        vectors = vectors[:count]
+    return vectors
+
+
+def stimulus_schedule(vectors, clk_period=CLK_PERIOD_PS, slot_cycles=SLOT_CYCLES):
+    """
+    Open-loop timeline for `vectors`, in time_scale units.
+
+    Operand and init changes happen a quarter period after the falling clock
+    edge, away from both clock edges. Returns (ops, stop_time) where ops is a
+    list of dicts with a, b, expected product, start time and a check time in
+    the middle of the window in which `done` is high and uo_out holds A*B.
+    """
+    quarter = clk_period // 4
+    first = (RESET_CYCLES + 1) * clk_period + quarter
+    ops = []
+    for i, (a, b) in enumerate(vectors):
+        t0 = first + i * slot_cycles * clk_period
+        ops.append(
+            {
+                "a": a,
+                "b": b,
+                "product": golden(a, b),
+                "start": t0,
+                "init_off": t0 + INIT_CYCLES * clk_period,
+                "check": t0 + 2 * quarter + (done_cycle(b) + DONE_HOLD_CYCLES // 2 - 1) * clk_period,
+            }
+        )
+    stop = first + len(vectors) * slot_cycles * clk_period
+    return ops, stop
+
+
+def _signal_block(name, start, edges):
+    lines = ["Digital_Signal", f"     Name: {name}", f"     Start_State: {start}"]
+    lines += [f"     Edge: {float(t):.1f} {v}" for t, v in edges]
+    return "\n".join(lines) + "\n\n"
+
+
+def _bus_block(name, start, edges):
+    lines = ["Digital_Bus", f"     Name: {name}", f"     Start_State: {start:X}"]
+    lines += [f"     Edge: {float(t):.1f} {v:X}" for t, v in edges]
+    return "\n".join(lines) + "\n\n"
+
+
+def write_tim(vectors, path, clk_period=CLK_PERIOD_PS, slot_cycles=SLOT_CYCLES):
+    """
+    Write one .tim covering every vector back-to-back, plus `<path>.csv` with
+    the expected product and check time of each operation.
+    """
+    ops, stop = stimulus_schedule(vectors, clk_period, slot_cycles)
+    half = clk_period // 2
+
+    clk_edges = []
+    t = half
+    while t <= stop:
+        clk_edges.append((t, 1))
+        clk_edges.append((t + half, 0))
+        t += clk_period
+
+    # rst_n high resets the FSM in this design; release it after RESET_CYCLES
+    rst_edges = [(RESET_CYCLES * clk_period, 0)]
+
+    init_edges, a_edges, b_edges = [], [], []
+    a_last = b_last = 0
+    for op in ops:
+        if op["a"] != a_last:
+            a_edges.append((op["start"], op["a"]))
+            a_last = op["a"]
+        if op["b"] != b_last:
+            b_edges.append((op["start"], op["b"]))
+            b_last = op["b"]
+        init_edges.append((op["start"], 1))
+        init_edges.append((op["init_off"], 0))
+
+    with open(path, "w") as f:
+        f.write(f"Time_Scale: {TIME_SCALE:E}\n\n")
+        f.write(_signal_block("clk", 0, clk_edges))
+        f.write(_signal_block("rst_n", 1, rst_edges))
+        f.write(_signal_block("init", 0, init_edges))
+        f.write(_bus_block("A[3:0]", 0, a_edges))
+        f.write(_bus_block("B[3:0]", 0, b_edges))
+
+    with open(f"{path}.csv", "w") as f:
+        f.write("op,a,b,product,start_s,check_s\n")
+        for i, op in enumerate(ops):
+            f.write(
+                f"{i},{op['a']},{op['b']},{op['product']},"
+                f"{op['start'] * TIME_SCALE:.12g},{op['check'] * TIME_SCALE:.12g}\n"
+            )
+
+    return ops, stop * TIME_SCALE
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="mult_4 operand sweep vectors")
+    ap.add_argument("--tim", required=True, help="output .tim stimulus")
+    ap.add_argument("--count", type=int, default=None, help="only the first N vectors")
+    ap.add_argument("--seed", type=int, default=None, help="shuffle the operand order")
+    ap.add_argument("--slot", type=int, default=SLOT_CYCLES, help="clock cycles per operation")
+    args = ap.parse_args()
+
+    ops, stop_s = write_tim(operand_vectors(args.count, args.seed), args.tim, slot_cycles=args.slot)
+    print(f"Wrote: {args.tim} ({len(ops)} operations, {stop_s:.3e} s)")
+    print(f"Expected results: {args.tim}.csv")
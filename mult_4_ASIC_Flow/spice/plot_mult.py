@@ -129,8 +129,10 @@ for i, (ax, sig) in enumerate(zip(axes, signals_in)):
             va='center', ha='left',
             fontsize=9, fontweight='bold', color=color)
 
+# Operandos al final de la simulación (A = ui_in[3:0], B = ui_in[7:4])
+op_final = sum(int(sig[-1] > 1.5) << i for i, sig in enumerate(UI_IN))
 axes[-1].set_xlabel('Time (s)', fontsize=11)
-plt.suptitle('Operands A=5 and B=13 of the Multiplier', fontsize=13, fontweight='bold')
+plt.suptitle(f'Operands A={op_final & 0xF} and B={op_final >> 4} of the Multiplier', fontsize=13, fontweight='bold')
 plt.tight_layout()
 plt.show()
 
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+cocotb_regress.py
+Corre en paralelo la regresión cocotb de un proyecto Tiny Tapeout (carpeta test/).
+Cada combinación (configuración RTL/GL, módulo de test, semilla) corre en su propio
+directorio aislado; el compilado del simulador se hace una sola vez por
+configuración y se reutiliza entre ejecuciones. Los results.xml de cada trabajo
+se agregan en un único reporte JUnit.
+Uso:
+  python3 tools/cocotb_regress.py TT_FemtoRV/test
+  python3 tools/cocotb_regress.py TT_Mult_4-main/test --gates both --seeds 1,2,3 -j 8
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# ---------- CONFIG ----------
+DEFAULT_SIM = "icarus"
+TOPLEVEL = "tb"
+REGRESS_DIR = "sim_build/regress"      # relativo a la carpeta test/
+DEFAULT_JUNIT = "regress_results.xml"
+LOG_TAIL = 40                          # líneas del log en el <failure> de un trabajo caído
+LOG_TAIL_FULL = 2000                   # ... y en su <system-out>
+
+# Mismos defines que test/Makefile usa con GATES=yes
+GL_DEFINES = {"GL_TEST": 1, "FUNCTIONAL": 1, "USE_POWER_PINS": 1, "SIM": 1}
+GL_BUILD_ARGS = ["-DUNIT_DELAY=#1"]    # va crudo: el runner citaría "#1" como string
+GL_PDK_SOURCES = [
+    "sky130A/libs.ref/sky130_fd_sc_hd/verilog/primitives.v",
+    "sky130A/libs.ref/sky130_fd_sc_hd/verilog/sky130_fd_sc_hd.v",
+]
+
+# ---------- MAKEFILE ----------
+def read_makefile_vars(test_dir):
+    """Lee las variables simples (VAR = valor / VAR ?= valor) del Makefile de cocotb."""
+    values = {}
+    for line in (Path(test_dir) / "Makefile").read_text().splitlines():
+        m = re.match(r'^\s*([A-Z_]+)\s*\??=\s*([^#]*)', line)
+        if m and m.group(1) not in values:
+            values[m.group(1)] = m.group(2).strip()
+    return values
+
+def project_config(test_dir, gates):
+    """Fuentes, defines e includes equivalentes a `make` (gates=False) o `make GATES=yes`."""
+    test_dir = Path(test_dir).resolve()
+    mk = read_makefile_vars(test_dir)
+    src_dir = (test_dir / ".." / "src").resolve()
+
+    if not gates:
+        sources = [src_dir / s for s in mk.get("PROJECT_SOURCES", "").split()]
+        defines, build_args = {}, []
+    else:
+        pdk_root = os.environ.get("PDK_ROOT")
+        if not pdk_root:
+            raise SystemExit("ERROR: PDK_ROOT no está definido (requerido para GL)")
+        sources = [Path(pdk_root) / s for s in GL_PDK_SOURCES]
+        sources.append(test_dir / "gate_level_netlist.v")
+        defines, build_args = dict(GL_DEFINES), list(GL_BUILD_ARGS)
+    sources.append(test_dir / "tb.v")
+
+    missing = [str(s) for s in sources if not s.exists()]
+    if missing:
+        raise SystemExit("ERROR: faltan fuentes:\n  " + "\n  ".join(missing))
+
+    modules = [m.strip() for m in mk.get("COCOTB_TEST_MODULES", "test").split(",") if m.strip()]
+    return {
+        "sources": [str(s) for s in sources],
+        "includes": [str(src_dir)],
+        "defines": defines,
+        "build_args": build_args,
+        "modules": modules,
+    }
+
+# ---------- BUILD / RUN ----------
+def build(sim, test_dir, cfg_name, cfg, always=False):
+    """Compila una configuración en sim_build/regress/<cfg>. Se salta si está al día."""
+    from cocotb_tools.runner import get_runner
+
+    build_dir = Path(test_dir).resolve() / REGRESS_DIR / cfg_name / "build"
+    runner = get_runner(sim)
+    runner.build(
+        sources=cfg["sources"],
+        includes=cfg["includes"],
+        defines=cfg["defines"],
+        build_args=cfg["build_args"],
+        hdl_toplevel=TOPLEVEL,
+        build_dir=build_dir,
+        always=always,
+        log_file=build_dir / "build.log",
+    )
+    return build_dir
+
+def run_job(sim, test_dir, build_dir, cfg_name, module, seed):
+    """Corre un módulo de test con una semilla en su propio directorio de trabajo.
+    Sin waves el runner pasa -none a vvp, así que el $dumpfile de tb.v no escribe nada."""
+    from cocotb_tools.runner import get_runner
+
+    test_dir = Path(test_dir).resolve()
+    # el módulo de test se importa desde test/ (PYTHONPATH se arma con sys.path)
+    if str(test_dir) not in sys.path:
+        sys.path.insert(0, str(test_dir))
+
+    work_dir = test_dir / REGRESS_DIR / cfg_name / f"{module}-seed{seed}"
+    results = work_dir / "results.xml"
+    if results.exists():
+        results.unlink()
+
+    t0 = time.time()
+    error = ""
+    try:
+        runner = get_runner(sim)
+        runner.test(
+            test_module=module,
+            hdl_toplevel=TOPLEVEL,
+            build_dir=build_dir,
+            test_dir=work_dir,
+            seed=seed,
+            results_xml=str(results),
+            log_file=work_dir / "sim.log",
+        )
+    except (Exception, SystemExit) as exc:
+        # el runner hace sys.exit() si el simulador termina con error: no debe tumbar la regresión
+        error = f"{type(exc).__name__}: {exc}"
+    return {
+        "config": cfg_name,
+        "module": module,
+        "seed": seed,
+        "results": str(results),
+        "log": str(work_dir / "sim.log"),
+        "error": error,
+        "wall": time.time() - t0,
+    }
+
+# ---------- JUNIT ----------
+def log_tail(path, lines=LOG_TAIL):
+    """Últimas líneas del log de un trabajo (o '' si no existe)."""
+    try:
+        with open(path, errors="replace") as f:
+            return "".join(f.readlines()[-lines:])
+    except OSError:
+        return ""
+
+def merge_junit(jobs, out_path):
+    """Agrega los results.xml de cada trabajo en un único <testsuites>. Devuelve (tests, fallos)."""
+    root = ET.Element("testsuites", name="regress")
+    n_tests = n_fail = 0
+    for job in jobs:
+        tag = f"{job['config']}.{job['module']}.seed{job['seed']}"
+        results = Path(job["results"]) if job["results"] else None
+        try:
+            parsed = ET.parse(results).getroot() if results is not None and results.exists() else None
+        except ET.ParseError:
+            parsed = None               # results.xml a medio escribir
+        if parsed is None:
+            # el simulador murió antes de escribir resultados: se reporta como fallo con su log
+            suite = ET.SubElement(root, "testsuite", name=tag, tests="1", failures="1")
+            case = ET.SubElement(suite, "testcase", classname=tag, name="simulation")
+            reason = job.get("error") or "sin results.xml"
+            failure = ET.SubElement(case, "failure", message=f"{reason}, ver {job['log']}")
+            failure.text = log_tail(job["log"])
+            ET.SubElement(case, "system-out").text = log_tail(job["log"], LOG_TAIL_FULL)
+            n_tests += 1
+            n_fail += 1
+            continue
+        for suite in parsed.iter("testsuite"):
+            suite.set("name", tag)
+            for case in suite.iter("testcase"):
+                case.set("classname", f"{tag}.{case.get('classname', '')}".rstrip("."))
+                n_tests += 1
+                if case.find("failure") is not None or case.find("error") is not None:
+                    n_fail += 1
+            root.append(suite)
+    root.set("tests", str(n_tests))
+    root.set("failures", str(n_fail))
+    ET.ElementTree(root).write(out_path, encoding="utf-8", xml_declaration=True)
+    return n_tests, n_fail
+
+# ---------- MAIN ----------
+def regress(test_dir, gates="rtl", modules=None, seeds=(1,), jobs=None,
+            sim=DEFAULT_SIM, junit=None, always=False):
+    test_dir = Path(test_dir).resolve()
+    cfg_names = ["rtl", "gl"] if gates == "both" else [gates]
+    configs = {name: project_config(test_dir, name == "gl") for name in cfg_names}
+
+    # 1) Compilar (una vez por configuración; se reutiliza si las fuentes no cambiaron)
+    build_dirs = {}
+    for name, cfg in configs.items():
+        t0 = time.time()
+        build_dirs[name] = build(sim, test_dir, name, cfg, always=always)
+        print(f"[build] {name}: {time.time() - t0:.1f} s")
+
+    # 2) Correr todas las combinaciones en paralelo
+    work = []
+    for name, cfg in configs.items():
+        for module in (modules or cfg["modules"]):
+            for seed in seeds:
+                work.append((sim, str(test_dir), str(build_dirs[name]), name, module, seed))
+
+    done = []
+    t0 = time.time()
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        futures = {pool.submit(run_job, *args): args for args in work}
+        for fut in as_completed(futures):
+            _, _, _, name, module, seed = futures[fut]
+            try:
+                job = fut.result()
+            except (Exception, SystemExit) as exc:  # el worker no llegó a correr el simulador
+                job = {"config": name, "module": module, "seed": seed,
+                       "results": "", "log": "", "error": repr(exc), "wall": 0.0}
+            done.append(job)
+            status = f"  ERROR {job['error']}" if job.get("error") else ""
+            print(f"[run] {name} {module} seed={seed}: {job['wall']:.1f} s{status}")
+    done.sort(key=lambda j: (j["config"], j["module"], j["seed"]))
+
+    # 3) Reporte JUnit único
+    out = Path(junit) if junit else test_dir / DEFAULT_JUNIT
+    n_tests, n_fail = merge_junit(done, out)
+    print(f"Wrote: {out}")
+    print(f"Jobs: {len(done)}  tests: {n_tests}  failures: {n_fail}  wall: {time.time() - t0:.1f} s")
+    return n_fail
+
+# ---------- CLI ----------
+def parse_seeds(text):
+    """'1,2,5' o '1-8' -> lista de enteros."""
+    seeds = []
+    for part in text.split(","):
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            seeds.extend(range(int(lo), int(hi) + 1))
+        elif part:
+            seeds.append(int(part))
+    return seeds
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Regresión cocotb paralela (RTL/GL)")
+    ap.add_argument("test_dir", help="carpeta test/ del proyecto Tiny Tapeout")
+    ap.add_argument("--gates", choices=["rtl", "gl", "both"], default="rtl")
+    ap.add_argument("--modules", help="módulos de test separados por coma (default: COCOTB_TEST_MODULES)")
+    ap.add_argument("--seeds", default="1", help="semillas, p.e. '1,2,3' o '1-16'")
+    ap.add_argument("-j", "--jobs", type=int, default=None, help="workers (default: todos los núcleos)")
+    ap.add_argument("--sim", default=os.environ.get("SIM", DEFAULT_SIM))
+    ap.add_argument("--junit", default=None, help=f"reporte agregado (default: test/{DEFAULT_JUNIT})")
+    ap.add_argument("--always", action="store_true", help="forzar recompilación")
+    args = ap.parse_args()
+
+    modules = [m.strip() for m in args.modules.split(",")] if args.modules else None
+    failures = regress(args.test_dir, args.gates, modules, parse_seeds(args.seeds),
+                       args.jobs, args.sim, args.junit, args.always)
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,42 @@
+"""
+spiceflow
+Utilidades compartidas del flujo post-layout (.tim -> .cir -> Xyce) de femtoRV_ASIC_Flow y
+mult_4_ASIC_Flow. Cada diseño solo aporta su mapeo de pines (tim_map.json junto al Makefile).
+Los submódulos se importan al primer uso, así `python -m spiceflow.<módulo>` no los
+carga dos veces.
+"""
+import importlib
+
+_EXPORTS = {
+    "Follower": "live",
+    "StageProfiler": "profile",
+    "RawFile": "raw",
+    "SpiceflowError": "errors",
+    "StimFile": "stim",
+    "Store": "store",
+    "activity_report": "activity",
+    "build_traces": "tim2cir",
+    "compare_raw": "rawdiff",
+    "convert_tim_to_cir": "tim2cir",
+    "energy_report": "power",
+    "event_windows": "power",
+    "extract_cone": "cone",
+    "find_mapping": "mapping",
+    "load_mapping": "mapping",
+    "load_stimulus": "stim",
+    "load_tim": "tim",
+    "parse_tim": "tim",
+    "raw_edges": "activity",
+    "raw_toggles": "activity",
+    "stim_toggles": "activity",
+    "window_energy": "power",
+    "write_stim": "stim",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module 'spiceflow' has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
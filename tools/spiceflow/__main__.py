@@ -0,0 +1,4 @@
+"""python -m spiceflow <archivo.tim> [<salida.cir>] [--map tim_map.json] [--profile]"""
+from .tim2cir import main
+
+main()
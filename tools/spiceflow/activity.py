@@ -0,0 +1,272 @@
+"""
+activity.py
+Actividad de conmutación: toggles por bit, densidad de toggles por ciclo de reloj,
+actividad por bus y ventanas más activas, todo vectorizado sobre la traza completa.
+Fuentes:
+  - el estímulo (.tim o su caché .stim), con los nodos del mapeo del diseño;
+  - salidas digitalizadas de un .raw (umbral con histéresis a 30 % / 70 % de VDD).
+Además propone la ventana corta más representativa (la que tiene el perfil de
+densidad por nodo más parecido al de toda la corrida) para simular a nivel transistor.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.activity tt_um_femto.tim
+  PYTHONPATH=../../tools python3 -m spiceflow.activity tt_um_mult_4.tim --raw tt_um_mult_4.raw \\
+      --nodes 'uo_out*' 'uio_out*' --window 64 --top 5 --json activity.json
+"""
+import argparse
+import json
+import re
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from .errors import SpiceflowError
+from .mapping import bus_bit_nodes, find_mapping, load_mapping, signal_node
+from .pwl import bus_bit
+from .raw import RawFile
+from .stim import load_stimulus
+
+LOW, HIGH = 0.3, 0.7        # histéresis de digitalización (fracción de VDD)
+RAW_CHUNK = 1 << 20         # puntos del .raw por bloque
+DEFAULT_RAW_NODES = ("uo_out*", "uio_out*")
+
+
+# ---------- TOGGLES ----------
+def _toggle_times(times_s, levels):
+    """Instantes en que cambia el nivel (levels = inicio + nivel tras cada flanco)."""
+    change = levels[1:] != levels[:-1]
+    return np.asarray(times_s)[change]
+
+
+def stim_toggles(stim, mapping=None):
+    """OrderedDict nodo -> instantes [s] de toggle, según el mapeo (el guardado en el .stim)."""
+    cfg = load_mapping(None) if mapping is None and stim.mapping is None else (mapping or stim.mapping)
+    out = OrderedDict()
+    driven = set()
+    for name in stim.names():
+        sig = stim.signal(name)
+        if sig.kind != "signal":
+            continue
+        node = signal_node(name, cfg)
+        if node is not None:
+            out[node] = _toggle_times(sig.times_s, sig.values)
+            driven.add(node)
+    for name in stim.names():
+        sig = stim.signal(name)
+        if sig.kind != "bus":
+            continue
+        times_s = sig.times_s
+        for k, node in bus_bit_nodes(name, (sig.width + 3) // 4, cfg):
+            if node not in driven:
+                out[node] = _toggle_times(times_s, bus_bit(sig.values, k))
+    return out
+
+
+def _schmitt(block, low, high, prev):
+    """
+    Digitaliza un bloque (puntos, nodos) con histéresis. prev: estado de cada nodo antes
+    del bloque (-1 = desconocido). Devuelve estados int8 (puntos, nodos).
+    """
+    n, k = block.shape
+    known = (block > high) | (block < low)
+    rows = np.where(known, np.arange(n)[:, None], -1)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    level = (block > high).astype(np.int8)
+    cols = np.broadcast_to(np.arange(k), (n, k))
+    state = level[np.maximum(rows, 0), cols]
+    return np.where(rows >= 0, state, prev[None, :]).astype(np.int8)
+
+
+def raw_edges(raw, patterns=DEFAULT_RAW_NODES, vdd=3.3, start=None, stop=None):
+    """
+    OrderedDict nodo -> (instantes [s], nivel tras cada flanco) de las señales del .raw que
+    cumplen patterns, digitalizadas con histéresis y en bloques de RAW_CHUNK puntos.
+    """
+    names = raw.match(patterns)
+    if not names:
+        return OrderedDict()
+    cols = [raw.index(n) for n in names]
+    t_all = raw.time
+    i0 = 0 if start is None else int(np.searchsorted(t_all, start))
+    i1 = raw.n_points if stop is None else int(np.searchsorted(t_all, stop, side="right"))
+
+    prev = np.full(len(cols), -1, dtype=np.int8)
+    found = [([], []) for _ in cols]
+    for a in range(i0, i1, RAW_CHUNK):
+        b = min(a + RAW_CHUNK, i1)
+        t = raw.column(0, a, b)
+        block = np.stack([raw.column(c, a, b) for c in cols], axis=1)
+        state = _schmitt(block, LOW * vdd, HIGH * vdd, prev)
+        before = np.vstack([prev[None, :], state[:-1]])
+        change = (state != before) & (before >= 0)
+        for j in range(len(cols)):
+            found[j][0].append(np.abs(t[change[:, j]]))
+            found[j][1].append(state[change[:, j], j])
+        prev = state[-1]
+    out = OrderedDict()
+    for n, (ts, lv) in zip(names, found):
+        node = n[2:-1] if n.lower().startswith("v(") and n.endswith(")") else n
+        out[node.lower()] = (np.concatenate(ts) if ts else np.zeros(0),
+                             np.concatenate(lv) if lv else np.zeros(0, dtype=np.int8))
+    return out
+
+
+def raw_toggles(raw, patterns=DEFAULT_RAW_NODES, vdd=3.3, start=None, stop=None):
+    """OrderedDict nodo -> instantes [s] de toggle de las señales del .raw que cumplen patterns."""
+    return OrderedDict((n, t) for n, (t, _) in raw_edges(raw, patterns, vdd, start, stop).items())
+
+
+def clock_period(toggles):
+    """Periodo a partir de los toggles de un reloj (dos toggles por ciclo)."""
+    if len(toggles) < 3:
+        return None
+    return float(np.median(np.diff(toggles))) * 2.0
+
+
+# ---------- REPORTE ----------
+def bus_of(node):
+    return re.sub(r'\[\d+\]$', '', node)
+
+
+def activity_report(toggles, t_end, period, window=64, step=None, top=5, t_start=0.0):
+    """
+    toggles: nodo -> instantes [s]. period: ciclo de reloj [s]. window/step en ciclos;
+    window debe ser múltiplo de step (default: el mayor divisor de window <= window/4).
+    Devuelve un dict con el resumen por nodo y por bus, las `top` ventanas más activas
+    (sin solaparse) y la ventana más representativa.
+    """
+    nodes = list(toggles)
+    duration = max(t_end - t_start, period)
+    n_cycles = duration / period
+    if window < 1 or (step is not None and step < 1):
+        raise SpiceflowError("window y step deben ser >= 1 ciclo")
+    divisor = next(s for s in range(max(1, window // 4), 0, -1) if window % s == 0)
+    step = step or divisor
+    if window % step:
+        raise SpiceflowError(f"window ({window}) debe ser múltiplo de step ({step}); "
+                         f"p.e. --window {max(step, window // step * step)} o --step {divisor}")
+    per_bin = window // step
+    n_bins = max(1, int(np.ceil(n_cycles / step)))
+
+    counts = np.array([len(toggles[n]) for n in nodes], dtype=np.int64)
+    density = counts / n_cycles
+
+    # matriz nodos x bins (step ciclos por bin) con un solo bincount
+    node_ids = np.concatenate([np.full(len(toggles[n]), i) for i, n in enumerate(nodes)]) if nodes else np.zeros(0, int)
+    all_t = np.concatenate([toggles[n] for n in nodes]) if nodes else np.zeros(0)
+    bins = np.clip(((all_t - t_start) / (period * step)).astype(np.int64), 0, n_bins - 1)
+    matrix = np.bincount(node_ids * n_bins + bins, minlength=len(nodes) * n_bins).reshape(len(nodes), n_bins)
+
+    # ventanas: per_bin bins consecutivos, vía suma acumulada
+    cs = np.concatenate([np.zeros((len(nodes), 1), dtype=np.int64), np.cumsum(matrix, axis=1)], axis=1)
+    n_win = max(1, n_bins - per_bin + 1)
+    win = cs[:, per_bin:per_bin + n_win] - cs[:, :n_win] if n_bins >= per_bin else cs[:, -1:]
+    win_total = win.sum(axis=0)
+    win_cycles = window
+
+    busiest = []
+    for w in np.argsort(-win_total, kind="stable"):
+        if len(busiest) >= top:
+            break
+        if all(abs(int(w) - b) >= per_bin for b in busiest):
+            busiest.append(int(w))
+
+    # representativa: distancia L1 entre densidades de la ventana y globales (normalizada)
+    ref = density.sum() or 1.0
+    dist = np.abs(win / win_cycles - density[:, None]).sum(axis=0) / ref
+    rep = int(np.argmin(dist))
+
+    def window_info(w):
+        t0 = t_start + w * step * period
+        return {"start_s": t0, "stop_s": t0 + win_cycles * period, "start_cycle": w * step,
+                "cycles": win_cycles, "toggles": int(win_total[w]),
+                "toggles_per_cycle": float(win_total[w] / win_cycles), "distance": float(dist[w])}
+
+    buses = OrderedDict()
+    for i, n in enumerate(nodes):
+        b = buses.setdefault(bus_of(n), {"bits": 0, "toggles": 0})
+        b["bits"] += 1
+        b["toggles"] += int(counts[i])
+    for b in buses.values():
+        b["toggles_per_cycle"] = b["toggles"] / n_cycles
+        b["per_bit_per_cycle"] = b["toggles_per_cycle"] / b["bits"]
+
+    return {
+        "period_s": period,
+        "cycles": n_cycles,
+        "window_cycles": win_cycles,
+        "step_cycles": step,
+        "nodes": OrderedDict((n, {"toggles": int(counts[i]), "per_cycle": float(density[i])})
+                             for i, n in enumerate(nodes)),
+        "buses": buses,
+        "total_per_cycle": float(counts.sum() / n_cycles),
+        "busiest": [window_info(w) for w in busiest],
+        "representative": window_info(rep),
+    }
+
+
+def print_report(rep):
+    print(f"Clock period: {rep['period_s']:.6g} s   cycles: {rep['cycles']:.0f}   "
+          f"toggles/cycle (all nodes): {rep['total_per_cycle']:.3f}")
+    print(f"\n{'node':<28} {'toggles':>9} {'per cycle':>10}")
+    for n, r in rep["nodes"].items():
+        print(f"{n:<28} {r['toggles']:9d} {r['per_cycle']:10.4f}")
+    print(f"\n{'bus':<28} {'bits':>5} {'toggles':>9} {'per cycle':>10} {'per bit':>8}")
+    for n, b in rep["buses"].items():
+        print(f"{n:<28} {b['bits']:5d} {b['toggles']:9d} {b['toggles_per_cycle']:10.4f} {b['per_bit_per_cycle']:8.4f}")
+    print(f"\nBusiest {rep['window_cycles']}-cycle windows:")
+    for w in rep["busiest"]:
+        print(f"  {w['start_s']:.6g} .. {w['stop_s']:.6g} s  (cycle {w['start_cycle']})  "
+              f"{w['toggles']} toggles, {w['toggles_per_cycle']:.3f}/cycle")
+    w = rep["representative"]
+    print(f"\nMost representative window: {w['start_s']:.6g} .. {w['stop_s']:.6g} s "
+          f"(cycle {w['start_cycle']}, {w['cycles']} cycles, L1 distance {w['distance']:.3f})")
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Reporte de actividad de conmutación (toggles)")
+    ap.add_argument("tim", nargs="?", help="estímulo .tim (se usa/crea el caché .stim)")
+    ap.add_argument("--map", help="mapeo de pines (default: tim_map.json junto al .tim)")
+    ap.add_argument("--raw", help="salidas de Xyce a digitalizar")
+    ap.add_argument("--nodes", nargs="+", default=list(DEFAULT_RAW_NODES), help="patrones de nodos del .raw")
+    ap.add_argument("--vdd", type=float, default=None, help="VDD para digitalizar (default: el del mapeo)")
+    ap.add_argument("--clock", default="clk", help="nodo de reloj (estímulo o .raw)")
+    ap.add_argument("--period", type=float, help="periodo de reloj [s] si no hay nodo de reloj")
+    ap.add_argument("--window", type=int, default=64, help="ventana en ciclos")
+    ap.add_argument("--step", type=int, help="paso entre ventanas en ciclos, divisor de --window (default: ~window/4)")
+    ap.add_argument("--top", type=int, default=5)
+    ap.add_argument("--json", help="guardar el reporte en JSON")
+    args = ap.parse_args()
+    if not args.tim and not args.raw:
+        ap.error("se necesita un .tim y/o --raw")
+
+    try:
+        toggles, t_end, vdd = OrderedDict(), 0.0, args.vdd
+        if args.tim:
+            cfg = load_mapping(args.map or find_mapping(Path(args.tim).parent, Path.cwd()))
+            stim = load_stimulus(args.tim, cfg)
+            toggles.update(stim_toggles(stim, cfg))
+            t_end = max([float(stim.signal(n).times_s[-1]) for n in stim.names() if len(stim.signal(n))] or [0.0])
+            if vdd is None:
+                vdd = cfg["vdd"]
+        if args.raw:
+            raw = RawFile(args.raw)
+            vdd = vdd or 3.3
+            if args.clock not in toggles and args.clock in raw:
+                toggles.update(raw_toggles(raw, [args.clock], vdd))
+            toggles.update(raw_toggles(raw, args.nodes, vdd))
+            if raw.n_points:
+                t_end = max(t_end, float(raw.time[-1]))
+
+        period = args.period or clock_period(toggles.get(args.clock, np.zeros(0)))
+        if not period:
+            raise SystemExit(f"ERROR: no hay reloj '{args.clock}'; indique --period")
+        rep = activity_report(toggles, t_end, period, args.window, args.step, args.top)
+    except SpiceflowError as e:
+        raise SystemExit(f"ERROR: {e}")
+    print_report(rep)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rep, f, indent=2)
+        print(f"\nWrote: {args.json}")
@@ -0,0 +1,501 @@
+"""
+cone.py
+Cono de influencia (fan-in transitivo) de unos nodos de salida sobre la netlist que
+extrae magic: plana (X<n> d g s b sky130_fd_pr__*fet* ..., resistencias, diodos, como
+tt_um_mult_4.spice) o jerárquica (un .subckt por celda estándar y el .subckt del diseño
+con una instancia por celda, como tt_um_femto.spice). En el nivel superior, desde cada
+nodo pedido se incluyen los dispositivos que lo manejan (transistores por drain/source/
+cuerpo, instancias por sus pines de salida, el resto por cualquier terminal) y se sigue
+con todos sus nodos, entradas incluidas, hasta llegar a las fuentes (VPWR/VGND) o a los
+pines que maneja el estímulo. Las direcciones de los pines de cada celda salen de sus
+dispositivos internos: un pin que toca el canal de un transistor (o la salida de una
+subcelda) maneja; uno que solo llega a compuertas es entrada. Solo se podan las
+instancias del nivel superior: las definiciones de las celdas se copian tal cual y al
+final se verifica que cada .subckt usado por el cono siga completo.
+Se escribe la netlist reducida y un .cir con solo las fuentes PWL de los pines que
+quedaron en el cono.
+Reloj y reset: su árbol de buffers se conserva (solo las ramas que llegan al cono) y
+las compuertas que cuelgan de un nodo del cono sin pertenecer a él quedan como carga
+(transistor: drain y source al cuerpo; celda: salidas a un nodo propio y las demás
+entradas a VGND), así la pendiente del reloj no cambia. Con --ideal NODO=PIN el árbol
+se corta en NODO y ese nodo se maneja directo con el PWL de PIN.
+En un diseño secuencial (femto) el cono completo llega a casi todos los registros por
+la realimentación; --depth N cruza como máximo N etapas de registros (celdas con CLK o
+GATE) y deja los de la última como frontera, con sus entradas de datos a VGND.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.cone tt_um_mult_4.spice 'uo_out[3]'
+  PYTHONPATH=../../tools python3 -m spiceflow.cone tt_um_femto.spice 'uo_out[1]' --depth 2 --ideal clknet_0_clk=clk
+  PYTHONPATH=../../tools python3 -m spiceflow.cone tt_um_mult_4.spice 'uo_out[3]' --no-loads --out cone_uo3
+"""
+import argparse
+import fnmatch
+import re
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+
+from .errors import SpiceflowError
+from .mapping import source_name
+
+RAILS = ("VPWR", "VGND", "0", "GND")
+# pines de alimentación de las celdas sky130 (no manejan ni son entradas lógicas)
+SUPPLY_PINS = {"vpwr", "vgnd", "vpb", "vnb", "vdd", "vss", "gnd", "0"}
+CLOCK_PINS = {"clk", "clk_n", "gate", "gate_n"}
+CONTROL_PINS = CLOCK_PINS | {"reset_b", "set_b"}   # se siguen como el reloj, no cuentan etapa
+LOAD_TIE = "VGND"
+
+
+# ---------- NETLIST ----------
+class Device:
+    __slots__ = ("name", "terms", "model", "params", "text", "inputs")
+
+    def __init__(self, name, terms, model, params, text):
+        self.name, self.terms, self.model, self.params, self.text = name, terms, model, params, text
+        # terminales que no manejan el nodo: la compuerta de un transistor (d g s b);
+        # las entradas de una instancia de celda se fijan al conocer su .subckt
+        self.inputs = frozenset([1]) if "fet" in model.lower() and len(terms) == 4 else frozenset()
+
+    def line(self, terms=None):
+        return " ".join([self.name] + list(terms or self.terms) + [self.model] + self.params)
+
+
+class Scope:
+    """Un .subckt (o el nivel de archivo, name=None): dispositivos y cuerpo en orden."""
+    def __init__(self, name=None, ports=(), header=""):
+        self.name, self.ports, self.header = name, list(ports), header
+        self.footer = ""
+        self.devices = []
+        self.body = []              # texto (str), índice de dispositivo (int) o Scope anidado
+
+
+class Netlist:
+    """
+    Netlist de magic por scopes. top es el scope que se poda: el nivel de archivo si tiene
+    dispositivos (netlist plana), si no el .subckt que nadie instancia (el diseño).
+    channel/gates: por nodo del top, los dispositivos que lo manejan / que lo tienen de entrada.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.root = Scope()
+        self.subckts = {}
+        stack = [self.root]
+        for line, text in self._lines():
+            tokens = line.split()
+            scope = stack[-1]
+            key = tokens[0].lower() if tokens else ""
+            if not tokens:
+                scope.body.append(text)
+            elif key == ".subckt" and len(tokens) >= 2:
+                sub = Scope(tokens[1], [t for t in tokens[2:] if "=" not in t], text)
+                self.subckts[tokens[1].lower()] = sub
+                scope.body.append(sub)
+                stack.append(sub)
+            elif key == ".ends" and len(stack) > 1:
+                scope.footer = text
+                stack.pop()
+            elif tokens[0][0].upper() in "XMRCD" and len(tokens) >= 3:
+                scope.body.append(len(scope.devices))
+                scope.devices.append(self._device(tokens, text))
+            else:
+                scope.body.append(text)
+        if len(stack) > 1:
+            raise SpiceflowError(f"{self.path.name}: .subckt {stack[-1].name} sin .ends")
+
+        self._roles = {}
+        for scope in self.scopes():
+            for dev in scope.devices:
+                self._set_inputs(dev)
+        self.top = self._find_top()
+        self.devices = self.top.devices
+        self.channel = defaultdict(list)
+        self.gates = defaultdict(list)
+        self.nets = {}              # minúsculas -> nombre original
+        for i, dev in enumerate(self.devices):
+            for k, net in enumerate(dev.terms):
+                self.nets.setdefault(net.lower(), net)
+                if k not in dev.inputs:
+                    self.channel[net.lower()].append(i)
+                elif not self._is_supply(dev, k):
+                    self.gates[net.lower()].append(i)
+
+    def _lines(self):
+        """(línea lógica con las continuaciones '+' unidas, texto original)."""
+        current = None
+        with open(self.path, errors="replace") as f:
+            for raw in f:
+                line = raw.rstrip("\n")
+                if line.startswith("+") and current is not None:
+                    current[0] += " " + line[1:].strip()
+                    current[1] += "\n" + line
+                    continue
+                if current is not None:
+                    yield tuple(current)
+                current = [line, line] if line.strip() else None
+                if current is None:
+                    yield "", ""
+        if current is not None:
+            yield tuple(current)
+
+    @staticmethod
+    def _device(tokens, text):
+        """Nombre, nodos, modelo y parámetros (k=v); C/R/D pueden traer un valor suelto al final."""
+        name = tokens[0]
+        rest = tokens[1:]
+        params = []
+        while rest and "=" in rest[-1]:
+            params.insert(0, rest.pop())
+        if name[0].upper() in "XMD":
+            model = rest.pop()
+        else:                       # C1 a b 1f / R1 a b 10 / R1 a b modelo
+            model = rest.pop() if len(rest) > 2 else ""
+        return Device(name, rest, model, params, text)
+
+    def scopes(self, scope=None):
+        scope = scope or self.root
+        yield scope
+        for item in scope.body:
+            if isinstance(item, Scope):
+                yield from self.scopes(item)
+
+    # ----- direcciones de pines -----
+    def pin_roles(self, name):
+        """{pin: 'in'|'out'|'supply'} de un .subckt, según sus dispositivos internos."""
+        key = name.lower()
+        if key in self._roles:
+            return self._roles[key]
+        self._roles[key] = None     # recursión (no debería haber)
+        sub = self.subckts[key]
+        drive, touch = set(), set()
+        for dev in sub.devices:
+            self._set_inputs(dev)
+            for k, net in enumerate(dev.terms):
+                touch.add(net.lower())
+                if k not in dev.inputs:
+                    drive.add(net.lower())
+        roles = OrderedDict()
+        for port in sub.ports:
+            p = port.lower()
+            if p in SUPPLY_PINS:
+                roles[port] = "supply"
+            elif p in drive or p not in touch:
+                roles[port] = "out"     # sin uso interno: se trata como salida (conservador)
+            else:
+                roles[port] = "in"
+        self._roles[key] = roles
+        return roles
+
+    def _set_inputs(self, dev):
+        sub = self.subckts.get(dev.model.lower())
+        if sub is None or dev.name[0].upper() != "X":
+            return
+        roles = self.pin_roles(dev.model)
+        if roles is None or len(roles) != len(dev.terms):
+            dev.inputs = frozenset()    # no coincide con el .subckt: todos los pines manejan
+            return
+        dev.inputs = frozenset(k for k, r in enumerate(roles.values()) if r != "out")
+
+    def _is_supply(self, dev, k):
+        sub = self.subckts.get(dev.model.lower())
+        return sub is not None and dev.inputs and list(self.pin_roles(dev.model).values())[k] == "supply"
+
+    def data_pins(self, dev):
+        """Terminales de datos de una instancia de registro (tiene reloj); vacío si no es registro."""
+        sub = self.subckts.get(dev.model.lower())
+        if sub is None or not dev.inputs:
+            return frozenset()
+        ports = [p.lower() for p in sub.ports]
+        if not CLOCK_PINS & set(ports):
+            return frozenset()
+        return frozenset(k for k in dev.inputs if ports[k] not in CONTROL_PINS and ports[k] not in SUPPLY_PINS)
+
+    def _find_top(self):
+        if self.root.devices:
+            return self.root
+        used = {dev.model.lower() for s in self.scopes() for dev in s.devices}
+        tops = [s for k, s in self.subckts.items() if k not in used]
+        if not tops:
+            raise SpiceflowError(f"{self.path.name}: no hay dispositivos en el nivel superior")
+        named = [s for s in tops if s.name.lower() == self.path.stem.lower()]
+        return named[0] if named else max(tops, key=lambda s: len(s.devices))
+
+    def resolve(self, patterns):
+        """Nodos que cumplen los patrones; un nombre exacto como 'uo_out[3]' se toma literal."""
+        out = []
+        for p in patterns:
+            if p.lower() in self.nets:
+                found = [p.lower()]
+            else:
+                found = sorted(n for n in self.nets if fnmatch.fnmatchcase(n, p.lower()))
+            if not found:
+                raise SpiceflowError(f"ningún nodo de {self.path.name} cumple {p!r}")
+            out.extend(n for n in found if n not in out)
+        return out
+
+
+# ---------- CONO ----------
+def fanin_cone(netlist, targets, stops=(), rails=RAILS, depth=None):
+    """
+    (índices de dispositivos del cono, nodos del cono, registros de frontera). Un nodo de
+    stops (pin con estímulo o nodo ideal) o de rails entra al cono pero no se sigue hacia
+    atrás. Con depth, las entradas de datos de un registro (no reloj ni reset) se siguen
+    solo hasta depth etapas de registros; los registros de la última etapa quedan de
+    frontera (sus entradas de datos fuera del cono se fijan al escribir).
+    """
+    stop = {n.lower() for n in stops} | {r.lower() for r in rails}
+    devices, nets, boundary = set(), set(), set()
+    frontier, next_stage, stage = [t.lower() for t in targets], [], 0
+    while frontier or next_stage:
+        if not frontier:
+            frontier, next_stage, stage = next_stage, [], stage + 1
+        net = frontier.pop()
+        if net in nets:
+            continue
+        nets.add(net)
+        if net in stop:
+            continue
+        for i in netlist.channel.get(net, ()):
+            if i in devices:
+                continue
+            devices.add(i)
+            dev = netlist.devices[i]
+            data = netlist.data_pins(dev)
+            for k, t in enumerate(dev.terms):
+                if k not in data:
+                    frontier.append(t.lower())
+                elif depth is not None and stage >= depth:
+                    boundary.add(i)
+                else:
+                    next_stage.append(t.lower())
+    return devices, nets, boundary
+
+
+def gate_loads(netlist, devices, nets, rails=RAILS):
+    """Dispositivos fuera del cono con una entrada (compuerta o pin) en un nodo (no fuente) del cono."""
+    rails = {r.lower() for r in rails}
+    loads = set()
+    for net in nets - rails:
+        loads.update(i for i in netlist.gates.get(net, ()) if i not in devices)
+    return loads
+
+
+def undriven(netlist, devices, nets, stops, rails=RAILS):
+    """Nodos del cono sin nada que los maneje (ni dispositivo ni fuente): quedan flotando."""
+    fixed = {n.lower() for n in stops} | {r.lower() for r in rails}
+    return sorted(netlist.nets[n] for n in nets - fixed
+                  if not any(i in devices for i in netlist.channel.get(n, ())))
+
+
+# ---------- SALIDA ----------
+def load_terms(netlist, dev, nets):
+    """Terminales de un dispositivo que queda solo como carga de un nodo del cono."""
+    if dev.inputs == frozenset([1]) and dev.model.lower() not in netlist.subckts:
+        d, g, s, b = dev.terms
+        return [b, g, b, b]
+    terms = []
+    for k, net in enumerate(dev.terms):
+        if k not in dev.inputs:
+            terms.append(f"{dev.name}__{k}")            # salida: nodo propio, sin más carga
+        elif net.lower() in nets or net.upper() in RAILS or netlist._is_supply(dev, k):
+            terms.append(net)
+        else:
+            terms.append(LOAD_TIE)                       # entrada fuera del cono: fija
+    return terms
+
+
+def write_netlist(netlist, out_path, devices, loads, targets, boundary=()):
+    """
+    Netlist reducida: del scope top solo los dispositivos del cono y las cargas, en el
+    orden original; todo lo demás (definiciones de celdas, comentarios) se copia tal cual.
+    """
+    nets = set()
+    for i in devices:
+        data = netlist.data_pins(netlist.devices[i]) if i in boundary else ()
+        nets.update(t.lower() for k, t in enumerate(netlist.devices[i].terms) if k not in data)
+
+    def emit(scope, f):
+        if scope.header:
+            f.write(scope.header + "\n")
+        for item in scope.body:
+            if isinstance(item, Scope):
+                emit(item, f)
+            elif isinstance(item, str):
+                f.write(item + "\n")
+            elif scope is not netlist.top:
+                f.write(scope.devices[item].text + "\n")
+            elif item in boundary:
+                dev = scope.devices[item]
+                data = netlist.data_pins(dev)
+                f.write(dev.line([LOAD_TIE if k in data and t.lower() not in nets else t
+                                  for k, t in enumerate(dev.terms)]) + "\n")
+            elif item in devices:
+                f.write(scope.devices[item].text + "\n")
+            elif item in loads:
+                dev = scope.devices[item]
+                f.write(dev.line(load_terms(netlist, dev, nets)) + "\n")
+        if scope.footer:
+            f.write(scope.footer + "\n")
+
+    with open(out_path, "w") as f:
+        f.write(f"* Cone of influence of {' '.join(targets)} from {netlist.path.name}\n")
+        f.write(f"* {len(devices)} devices + {len(loads)} gate loads of {len(netlist.devices)}\n")
+        emit(netlist.root, f)
+    return out_path
+
+
+def check_netlist(out_path, netlist):
+    """
+    Verifica la netlist reducida: cada .subckt que usa su nivel superior (y los que usan
+    esos) debe seguir definido y con los mismos dispositivos que en la original.
+    """
+    reduced = Netlist(out_path)
+    pending = [d.model.lower() for d in reduced.top.devices if d.model.lower() in netlist.subckts]
+    seen, bad = set(), []
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        orig, new = netlist.subckts[name], reduced.subckts.get(name)
+        if new is None or new.ports != orig.ports or \
+                [d.text for d in new.devices] != [d.text for d in orig.devices]:
+            bad.append(orig.name)
+            continue
+        pending.extend(d.model.lower() for d in orig.devices if d.model.lower() in netlist.subckts)
+    if bad:
+        raise SpiceflowError(f"{out_path}: .subckt incompletos o faltantes: {', '.join(sorted(bad))}")
+    return len(seen)
+
+
+def cir_sources(cir_path):
+    """{nodo en minúsculas: nombre de la fuente} de las fuentes a tierra del .cir (pines con estímulo)."""
+    sources = {}
+    with open(cir_path, errors="replace") as f:
+        for line in f:
+            if line[:1] in "Vv":
+                parts = line.split(None, 3)
+                if len(parts) >= 3 and parts[2] == "0":
+                    sources[parts[1].lower()] = parts[0]
+    return sources
+
+
+def write_stimulus(cir_path, out_path, spice_name, keep, ideal, rails=RAILS):
+    """
+    Copia el .cir dejando solo las fuentes de los nodos en keep (y las de alimentación),
+    agrega las fuentes de los nodos ideales (copia del PWL de su pin), incluye la netlist
+    reducida y cambia el .raw de salida. Se lee línea por línea: los PWL pueden ser enormes.
+    """
+    rails = {r.lower() for r in rails}
+    by_pin = defaultdict(list)
+    for net, pin in ideal.items():
+        by_pin[pin.lower()].append(net)
+    held, dropped, kept = [], False, []
+    with open(cir_path, errors="replace") as fin, open(out_path, "w") as fout:
+        for line in fin:
+            if line.startswith("*"):
+                held.append(line)
+                continue
+            if not line.strip() and dropped:
+                dropped = False
+                continue
+            dropped = False
+            parts = line.split(None, 3)
+            if line[:1] in "Vv" and len(parts) >= 4 and parts[2] == "0":
+                node = parts[1].lower()
+                for net in by_pin.get(node, ()):
+                    fout.write(f"* {net} (ideal, from {parts[1]})\n")
+                    fout.write(f"{source_name(net).replace('V_', 'V_ideal_', 1)} {net} 0 {parts[3]}")
+                    if not parts[3].endswith("\n"):
+                        fout.write("\n")
+                if node not in keep and node not in rails:
+                    held, dropped = [], True
+                    continue
+                kept.append(parts[1])
+            elif line.lower().startswith(".include"):
+                line = f'.include "./{spice_name}"\n'
+            elif line.lower().startswith(".print"):
+                line = re.sub(r'\bfile=\S+', f"file={Path(out_path).with_suffix('').name}.raw", line)
+            fout.writelines(held)
+            held = []
+            fout.write(line)
+        fout.writelines(held)
+    return kept
+
+
+def extract_cone(spice_path, targets, cir_path=None, out=None, ideal=None, loads=True, depth=None):
+    """Calcula el cono y escribe <out>.spice y, si hay .cir, <out>.cir; devuelve un resumen."""
+    spice_path = Path(spice_path)
+    cir_path = Path(cir_path) if cir_path else spice_path.with_suffix(".cir")
+    ideal = {k.lower(): v for k, v in (ideal or {}).items()}
+    netlist = Netlist(spice_path)
+    nets_out = netlist.resolve(targets)
+    sources = cir_sources(cir_path) if cir_path.exists() else {}
+    if not sources:
+        print(f"Aviso: sin {cir_path.name}; el cono solo se corta en las fuentes de alimentación")
+    stops = set(sources) | set(ideal)
+    devices, nets, boundary = fanin_cone(netlist, nets_out, stops, depth=depth)
+    load_set = gate_loads(netlist, devices, nets) if loads else set()
+
+    out = str(out) if out else str(spice_path.with_name(f"{spice_path.stem}.cone"))
+    spice_out = Path(out + ".spice")
+    write_netlist(netlist, spice_out, devices, load_set, [netlist.nets[n] for n in nets_out], boundary)
+    print(f"Wrote: {spice_out}")
+    checked = check_netlist(spice_out, netlist)
+    if checked:
+        print(f"  {checked} .subckt usados por el cono, completos")
+    inputs = sorted(netlist.nets[n] for n in (nets & set(sources)) - {r.lower() for r in RAILS})
+    summary = {
+        "targets": [netlist.nets[n] for n in nets_out],
+        "devices": len(devices), "total_devices": len(netlist.devices), "gate_loads": len(load_set),
+        "depth": depth, "boundary_registers": len(boundary),
+        "nets": len(nets), "inputs": inputs,
+        "ideal": {netlist.nets.get(n, n): p for n, p in ideal.items() if n in nets},
+        "undriven": undriven(netlist, devices, nets, stops),
+    }
+    if sources:
+        keep = {n for n in nets if n in sources}
+        cir_out = Path(out + ".cir")
+        summary["sources"] = write_stimulus(cir_path, cir_out, spice_out.name, keep, summary["ideal"])
+        print(f"Wrote: {cir_out}")
+    return summary
+
+
+def print_summary(s):
+    pct = 100 * s["devices"] / max(s["total_devices"], 1)
+    print(f"\nCono de {', '.join(s['targets'])}: {s['devices']} de {s['total_devices']} dispositivos "
+          f"({pct:.1f} %), {s['nets']} nodos, {s['gate_loads']} cargas de compuerta")
+    print(f"  Pines con estímulo en el cono: {', '.join(s['inputs']) or '-'}")
+    if s["depth"] is not None:
+        print(f"  {s['boundary_registers']} registros de frontera a {s['depth']} etapas "
+              f"(entradas de datos fuera del cono a {LOAD_TIE})")
+    for net, pin in s["ideal"].items():
+        print(f"  Ideal: {net} <- PWL de {pin}")
+    if s["undriven"]:
+        shown = ", ".join(s["undriven"][:10]) + (" ..." if len(s["undriven"]) > 10 else "")
+        print(f"  Aviso: {len(s['undriven'])} nodos sin driver en el cono: {shown}")
+
+
+def parse_ideal(spec):
+    if "=" not in spec:
+        raise argparse.ArgumentTypeError(f"--ideal espera NODO=PIN, no {spec!r}")
+    net, pin = spec.split("=", 1)
+    return net, pin
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Netlist reducida al cono de influencia de unos nodos")
+    ap.add_argument("spice", help="netlist de magic, plana o jerárquica (tt_um_<diseño>.spice)")
+    ap.add_argument("nodes", nargs="+", help="nodos de salida o patrones glob (p.e. 'uo_out[3]')")
+    ap.add_argument("--cir", help="netlist con el estímulo (default: <spice>.cir)")
+    ap.add_argument("--out", help="prefijo de salida (default: <spice>.cone -> .spice/.cir)")
+    ap.add_argument("--ideal", type=parse_ideal, action="append", default=[], metavar="NODO=PIN",
+                    help="cortar en NODO y manejarlo con el PWL de PIN (p.e. el árbol de reloj)")
+    ap.add_argument("--depth", type=int, help="máximo de etapas de registros hacia atrás (netlist jerárquica)")
+    ap.add_argument("--no-loads", action="store_true", help="no dejar las compuertas de fuera del cono como carga")
+    args = ap.parse_args()
+
+    try:
+        summary = extract_cone(args.spice, args.nodes, args.cir, args.out, OrderedDict(args.ideal),
+                               loads=not args.no_loads, depth=args.depth)
+    except SpiceflowError as e:
+        raise SystemExit(f"ERROR: {e}")
+    print_summary(summary)
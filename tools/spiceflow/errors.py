@@ -0,0 +1,10 @@
+"""
+errors.py
+Error de la librería: las funciones de spiceflow levantan SpiceflowError (un ValueError,
+así que `except ValueError`/`except Exception` lo atrapan) y solo los bloques __main__
+lo convierten en SystemExit("ERROR: ...").
+"""
+
+
+class SpiceflowError(ValueError):
+    """Entrada inválida: mapeo, .raw, netlist o parámetros de un reporte."""
@@ -0,0 +1,97 @@
+"""
+fakesim.py
+Simulador falso para probar monitor.py, live.py y flow.py sin Xyce: lee el .tran, las
+fuentes PWL y el .print tran ... file=X.raw del .cir, y escribe el .raw de a poco
+(como Xyce) imprimiendo las mismas líneas de avance ("Percent complete", "Current
+simulation time"). Las salidas uo_out* son contadores; si el .cir no trae fuente de clk
+se agrega un V(CLK) cuadrado para que activity/power tengan reloj. --slow emula un tramo de tiempo
+simulado en el que el solver se frena.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.fakesim tt_um_mult_4.cir
+  PYTHONPATH=../../tools python3 -m spiceflow.monitor -- python3 -m spiceflow.fakesim tt_um_mult_4.cir --wall 20 --slow 0.4:0.5:10
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .monitor import raw_path_for
+from .raw import write_raw
+
+
+def cir_sources(text):
+    """{nodo: (tiempos, valores)} de las fuentes V_<nodo> <nodo> 0 PWL(...)."""
+    out = {}
+    for node, pts in re.findall(r'^V_\S+\s+(\S+)\s+0\s+PWL\(([^)]*)\)', text, re.MULTILINE | re.IGNORECASE):
+        v = np.array(pts.split(), dtype=float).reshape(-1, 2)
+        out[node] = (v[:, 0], v[:, 1])
+    return out
+
+
+def parse_slow(spec):
+    """'desde:hasta:factor' como fracción del .tran."""
+    try:
+        a, b, k = (float(x) for x in spec.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"--slow espera desde:hasta:factor, no {spec!r}")
+    return a, b, k
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Simulador falso con salida y .raw estilo Xyce")
+    ap.add_argument("cir")
+    ap.add_argument("--points", type=int, default=20000, help="puntos de tiempo del .raw")
+    ap.add_argument("--wall", type=float, default=5.0, help="segundos de reloj de la corrida completa")
+    ap.add_argument("--outputs", type=int, default=8, help="bits uo_out* sintéticos")
+    ap.add_argument("--vdd", type=float, default=3.3)
+    ap.add_argument("--period", type=float, help="periodo del clk sintético [s] (default: 20 puntos por ciclo)")
+    ap.add_argument("--slow", type=parse_slow, action="append", default=[],
+                    help="tramo lento desde:hasta:factor (fracciones del .tran)")
+    ap.add_argument("--fail", action="store_true", help="terminar con error a mitad de la corrida")
+    args = ap.parse_args()
+
+    text = Path(args.cir).read_text()
+    m = re.search(r'^\.tran\s+(\S+)\s+(\S+)', text, re.MULTILINE | re.IGNORECASE)
+    if not m:
+        raise SystemExit(f"ERROR: {args.cir} no tiene .tran")
+    stop = float(m.group(2))
+    t = np.linspace(0, stop, args.points)
+    names, cols = ["TIME"], [t]
+    for node, (pt, pv) in cir_sources(text).items():
+        names.append(f"V({node.upper()})")
+        cols.append(np.interp(t, pt, pv))
+    k = np.arange(len(t))
+    if "V(CLK)" not in names:
+        period = args.period or 20 * stop / max(args.points - 1, 1)
+        names.append("V(CLK)")
+        cols.append(args.vdd * ((t // (period / 2)) % 2 == 1))
+    for b in range(args.outputs):
+        names.append(f"V(UO_OUT[{b}])")
+        cols.append(args.vdd * ((k // (max(args.points // 40, 1) << b)) % 2))
+    data = np.stack(cols, axis=1)
+
+    # costo de reloj de cada punto: 1, o el factor dentro de un tramo lento
+    cost = np.ones(len(t))
+    for a, b, f in args.slow:
+        cost[(t >= a * stop) & (t < b * stop)] = f
+    cost *= args.wall / cost.sum()
+
+    print("***** Xyce (fakesim)")
+    print(f"***** Beginning Transient Calculation, stop = {stop:g}")
+    raw = raw_path_for(args.cir)
+    write_raw(raw, names, data[:0])
+    step = max(len(t) // 200, 1)
+    with open(raw, "ab") as f:
+        for i in range(0, len(t), step):
+            j = min(i + step, len(t))
+            time.sleep(cost[i:j].sum())
+            f.write(np.ascontiguousarray(data[i:j]).tobytes())
+            f.flush()
+            print(f"  ***** Percent complete: {100 * t[j - 1] / stop:.4f} %")
+            print(f"  ***** Current simulation time: {t[j - 1]:.6e}", flush=True)
+            if args.fail and j > len(t) // 2:
+                raise SystemExit("Time step too small near t = {:.6e}".format(t[j - 1]))
+    print("***** Solution Summary *****")
+    print(f"  Number Successful Steps Taken: {len(t) - 1}")
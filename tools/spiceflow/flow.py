@@ -0,0 +1,305 @@
+"""
+flow.py
+Flujo post-layout de ambos diseños como un grafo de pasos:
+  extract (opcional, magic en batch) -> convert (.tim -> .cir) -> simulate (Xyce)
+  -> activity / plot (post-proceso)
+Cada paso declara sus entradas y salidas; las dependencias salen de quién produce qué.
+La llave de un paso es el sha256 del comando (sin el intérprete ni las opciones del
+monitor) y del contenido de sus entradas: si no cambió y sus salidas siguen ahí, el
+paso se salta. Los pasos de CPU (conversión, post-proceso) corren en paralelo entre sí
+y con la simulación de otro diseño; las simulaciones usan su propio cupo (--sim-jobs),
+porque cada una ya ocupa NPROC núcleos.
+Estado y hashes en <repo>/.flow_state.json (los archivos grandes no se vuelven a leer
+mientras no cambien tamaño ni mtime); la salida de cada paso en <spice>/flow_logs/.
+Uso:
+  PYTHONPATH=tools python3 -m spiceflow.flow                        # ambos diseños
+  PYTHONPATH=tools python3 -m spiceflow.flow mult_4 --dry-run
+  PYTHONPATH=tools python3 -m spiceflow.flow mult_4 --tim tt_um_mult_4_sweep.tim
+  PYTHONPATH=tools python3 -m spiceflow.flow femto --steps convert simulate --nproc 8
+  PYTHONPATH=tools python3 -m spiceflow.flow --force mult_4:simulate --timing flow_timing.json
+  PYTHONPATH=tools python3 -m spiceflow.flow mult_4 --sim-cmd "python3 -m spiceflow.fakesim {cir}"   # sin Xyce
+"""
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+PACKAGE = Path(__file__).resolve().parent
+REPO = PACKAGE.parents[1]
+STATE = ".flow_state.json"
+LOG_DIR = "flow_logs"
+MAGIC_TECH = os.environ.get("MAGIC_TECH", "/home/linux/.volare/sky130A/libs.tech/magic/sky130A.tech")
+SIM_CMD = "mpirun -np {nproc} Xyce {cir}"
+
+DESIGNS = {
+    "mult_4": "mult_4_ASIC_Flow/spice",
+    "femto": "femtoRV_ASIC_Flow/spice",
+}
+STEPS = ("extract", "convert", "simulate", "activity", "plot")
+CONVERTER_SOURCES = ("tim.py", "pwl.py", "mapping.py", "stim.py", "tim2cir.py")
+
+EXTRACT_TCL = """gds read {gds}
+load {top}
+extract all
+ext2spice lvs
+ext2spice cthresh 0
+ext2spice
+quit -noprompt
+"""
+
+
+class Step:
+    """
+    Un paso del grafo. key_cmd es la parte del comando que entra en la llave (sin el
+    intérprete de Python ni opciones que no cambian el resultado); files son archivos
+    {ruta: texto} que el paso escribe justo antes de correr.
+    """
+    def __init__(self, design, name, cmd, cwd, inputs, outputs, pool="cpu", key_cmd=None, files=None):
+        self.design = design
+        self.name = name
+        self.cmd = cmd
+        self.key_cmd = cmd if key_cmd is None else key_cmd
+        self.cwd = Path(cwd)
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.pool = pool
+        self.files = files or {}
+
+    @property
+    def id(self):
+        return f"{self.design}:{self.name}"
+
+
+# ---------- DEFINICIÓN ----------
+def design_steps(design, root, nproc=4, sim_cmd=SIM_CMD, extract=False, tim=None):
+    d = Path(root) / DESIGNS[design]
+    top = f"tt_um_{design}"
+    cir, raw, spice = (d / f"{top}{ext}" for ext in (".cir", ".raw", ".spice"))
+    tim = d / (tim or f"{top}.tim")         # otro estímulo (p.e. el barrido de mult_4) sin cambiar el .cir/.raw
+    # la llave de los pasos de Python no incluye sys.executable: cambiar de venv no invalida nada
+    py = [sys.executable, "-m"]
+    steps = []
+    if extract:
+        script = d / LOG_DIR / "extract.tcl"
+        tcl = EXTRACT_TCL.format(gds=f"{top}.gds", top=top)
+        magic = ["magic", "-dnull", "-noconsole", "-T", MAGIC_TECH]
+        steps.append(Step(design, "extract", magic + [str(script)], d, [d / f"{top}.gds"], [spice],
+                          key_cmd=magic + [tcl], files={script: tcl}))
+    convert = ["spiceflow", os.path.relpath(tim, d), cir.name, "--map", "tim_map.json"]
+    steps.append(Step(design, "convert", py + convert, d,
+                      [tim, d / "tim_map.json"] + [PACKAGE / s for s in CONVERTER_SOURCES], [cir], key_cmd=convert))
+    # monitor.py envuelve al simulador: avance/ETA en el log y <top>.progress.csv; la llave es solo el simulador
+    sim = shlex.split(sim_cmd.format(nproc=nproc, cir=cir.name))
+    steps.append(Step(design, "simulate", py + ["spiceflow.monitor", "--quiet", "--interval", "30", "--"] + sim, d,
+                      [cir, spice], [raw, d / f"{top}.progress.csv"], pool="sim", key_cmd=sim))
+    activity = ["spiceflow.activity", os.path.relpath(tim, d), "--raw", raw.name, "--json", "activity.json"]
+    steps.append(Step(design, "activity", py + activity, d,
+                      [tim, raw, PACKAGE / "activity.py"], [d / "activity.json"], key_cmd=activity))
+    plot = ["spiceflow.live", raw.name, "--save", f"{top}.png", "--updates", "1"]
+    steps.append(Step(design, "plot", py + plot, d,
+                      [raw, PACKAGE / "live.py"], [d / f"{top}.png"], key_cmd=plot))
+    return steps
+
+
+# ---------- HASHES Y ESTADO ----------
+class State:
+    """Hashes de archivos (cacheados por tamaño/mtime) y la última llave de cada paso."""
+    def __init__(self, path):
+        self.path = Path(path)
+        data = json.loads(self.path.read_text()) if self.path.exists() else {}
+        self.files = data.get("files", {})
+        self.steps = data.get("steps", {})
+        self.lock = threading.Lock()
+
+    def file_hash(self, path):
+        path = Path(path)
+        st = path.stat()
+        sig = [st.st_size, st.st_mtime_ns]
+        key = str(path.resolve())
+        with self.lock:
+            cached = self.files.get(key)
+        if cached and cached[:2] == sig:
+            return cached[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        with self.lock:
+            self.files[key] = sig + [h.hexdigest()]
+        return h.hexdigest()
+
+    def step_key(self, step):
+        h = hashlib.sha256(json.dumps(step.key_cmd).encode())
+        for p in step.inputs:
+            h.update(str(p.name).encode())
+            h.update(self.file_hash(p).encode())
+        return h.hexdigest()
+
+    def outputs_sig(self, step):
+        return {str(p): [p.stat().st_size, p.stat().st_mtime_ns] for p in step.outputs}
+
+    def up_to_date(self, step, key):
+        prev = self.steps.get(step.id)
+        if not prev or prev["key"] != key or not all(p.exists() for p in step.outputs):
+            return False
+        return prev["outputs"] == self.outputs_sig(step)
+
+    def record(self, step, key, seconds):
+        with self.lock:
+            self.steps[step.id] = {"key": key, "outputs": self.outputs_sig(step),
+                                   "seconds": round(seconds, 3), "finished": time.time()}
+
+    def save(self):
+        with self.lock:
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"files": self.files, "steps": self.steps}, indent=1))
+            os.replace(tmp, self.path)
+
+
+# ---------- EJECUCIÓN ----------
+def dependencies(steps):
+    producers = {out.resolve(): s for s in steps for out in s.outputs}
+    return {s.id: {producers[p.resolve()].id for p in s.inputs
+                   if p.resolve() in producers and producers[p.resolve()] is not s} for s in steps}
+
+
+def execute(step, state, force, t_start):
+    """Corre un paso (o lo salta); devuelve (estado, segundos, mensaje)."""
+    missing = [p for p in step.inputs if not p.exists()]
+    if missing:
+        return "missing", 0.0, "falta " + ", ".join(p.name for p in missing)
+    key = state.step_key(step)
+    if not force and state.up_to_date(step, key):
+        return "skipped", 0.0, "sin cambios"
+    log_dir = step.cwd / LOG_DIR
+    log_dir.mkdir(exist_ok=True)
+    log = log_dir / f"{step.name}.log"
+    for path, text in step.files.items():
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(text)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PACKAGE.parent),
+                                                                    os.environ.get("PYTHONPATH")])))
+    t0 = time.monotonic()
+    print(f"[{t0 - t_start:8.1f}s] {step.id:<18} start")
+    try:
+        with open(log, "w") as f:
+            rc = subprocess.run(step.cmd, cwd=step.cwd, env=env, stdout=f, stderr=subprocess.STDOUT).returncode
+    except FileNotFoundError as e:
+        return "failed", time.monotonic() - t0, f"{e.filename} no encontrado"
+    seconds = time.monotonic() - t0
+    if rc != 0:
+        return "failed", seconds, f"código {rc}, ver {log}"
+    absent = [p.name for p in step.outputs if not p.exists()]
+    if absent:
+        return "failed", seconds, f"no generó {', '.join(absent)}"
+    state.record(step, key, seconds)
+    state.save()
+    return "ran", seconds, str(log.relative_to(step.cwd))
+
+
+def run_flow(steps, state, jobs=None, sim_jobs=1, force=(), dry_run=False):
+    """Ejecuta el grafo; devuelve {id: {status, seconds, start, message}}."""
+    deps = dependencies(steps)
+    by_id = {s.id: s for s in steps}
+    results = {}
+    t_start = time.monotonic()
+
+    if dry_run:
+        for s in steps:
+            if any(results[d]["status"] in ("run", "pending") for d in deps[s.id] if d in results):
+                status = "pending"
+            elif any(not p.exists() for p in s.inputs):
+                status = "missing"
+            elif s.id in force or not state.up_to_date(s, state.step_key(s)):
+                status = "run"
+            else:
+                status = "skipped"
+            results[s.id] = {"status": status, "seconds": 0.0, "start": 0.0, "message": ""}
+            print(f"  {s.id:<18} {status:<8} {' '.join(s.cmd)}")
+        return results
+
+    pools = {"cpu": ThreadPoolExecutor(jobs or os.cpu_count() or 1), "sim": ThreadPoolExecutor(sim_jobs)}
+    running = {}
+    pending = [s.id for s in steps]
+    try:
+        while pending or running:
+            for sid in list(pending):
+                if not deps[sid] <= set(results):
+                    continue
+                pending.remove(sid)
+                bad = [d for d in deps[sid] if results[d]["status"] not in ("ran", "skipped")]
+                if bad:
+                    results[sid] = {"status": "blocked", "seconds": 0.0, "start": 0.0,
+                                    "message": f"falló {', '.join(bad)}"}
+                    continue
+                step = by_id[sid]
+                fut = pools[step.pool].submit(execute, step, state, sid in force, t_start)
+                running[fut] = (sid, time.monotonic() - t_start)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                sid, start = running.pop(fut)
+                status, seconds, message = fut.result()
+                results[sid] = {"status": status, "seconds": seconds, "start": start, "message": message}
+                print(f"[{time.monotonic() - t_start:8.1f}s] {sid:<18} {status:<8} {seconds:8.2f}s  {message}")
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+        state.save()
+    return results
+
+
+def print_timing(results, wall):
+    print(f"\n{'step':<20} {'status':<8} {'start [s]':>10} {'time [s]':>10}")
+    for sid, r in results.items():
+        print(f"{sid:<20} {r['status']:<8} {r['start']:10.2f} {r['seconds']:10.2f}")
+    busy = sum(r["seconds"] for r in results.values())
+    print(f"\nWall: {wall:.2f} s   suma de pasos: {busy:.2f} s   solapamiento: {busy / max(wall, 1e-9):.2f}x")
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Flujo extract/convert/simulate/post-proceso con caché por contenido")
+    ap.add_argument("designs", nargs="*", help=f"diseños: {', '.join(DESIGNS)} (default: todos)")
+    ap.add_argument("--steps", nargs="+", choices=STEPS, help="solo estos pasos (default: todos menos extract)")
+    ap.add_argument("--extract", action="store_true", help="incluir la extracción con magic (batch)")
+    ap.add_argument("--jobs", type=int, help="pasos de CPU en paralelo (default: núcleos)")
+    ap.add_argument("--sim-jobs", type=int, default=1, help="simulaciones en paralelo")
+    ap.add_argument("--nproc", type=int, default=4, help="procesos MPI por simulación")
+    ap.add_argument("--tim", help="estímulo relativo a la carpeta spice/ (un solo diseño; default: <top>.tim)")
+    ap.add_argument("--sim-cmd", default=SIM_CMD, help=f"comando del simulador (default: '{SIM_CMD}')")
+    ap.add_argument("--force", nargs="+", default=[], help="pasos a correr igual, p.e. mult_4:simulate")
+    ap.add_argument("--dry-run", action="store_true", help="mostrar qué correría sin ejecutar")
+    ap.add_argument("--root", default=REPO, help="raíz del repositorio")
+    ap.add_argument("--timing", help="guardar tiempos por paso en JSON")
+    args = ap.parse_args()
+    designs = args.designs or list(DESIGNS)
+    unknown = set(designs) - set(DESIGNS)
+    if unknown:
+        ap.error(f"diseños desconocidos: {', '.join(sorted(unknown))}")
+    if args.tim and len(designs) != 1:
+        ap.error("--tim requiere un solo diseño")
+
+    wanted = set(args.steps or [s for s in STEPS if s != "extract"]) | ({"extract"} if args.extract else set())
+    steps = [s for d in designs
+             for s in design_steps(d, args.root, args.nproc, args.sim_cmd, "extract" in wanted, args.tim)
+             if s.name in wanted]
+    state = State(Path(args.root) / STATE)
+    t0 = time.monotonic()
+    results = run_flow(steps, state, args.jobs, args.sim_jobs, set(args.force), args.dry_run)
+    if not args.dry_run:
+        print_timing(results, time.monotonic() - t0)
+    if args.timing:
+        with open(args.timing, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Wrote: {args.timing}")
+    if any(r["status"] in ("failed", "missing", "blocked") for r in results.values()):
+        sys.exit(1)
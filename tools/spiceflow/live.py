@@ -0,0 +1,250 @@
+"""
+live.py
+Modo "follow" para mirar una simulación mientras Xyce todavía escribe el .raw: cada
+pocos segundos se vuelve a mapear el archivo, se leen solo los puntos nuevos y se
+actualizan las gráficas (decimadas: mín/máx/último valor por intervalo de tiempo) y
+los valores de los buses digitalizados. Así un estímulo equivocado se ve en minutos
+y la corrida se puede matar sin esperar a que termine.
+Sin pantalla (ssh), --save escribe un PNG en cada actualización.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.live tt_um_mult_4.raw
+  PYTHONPATH=../../tools python3 -m spiceflow.live tt_um_femto.raw --nodes 'uo_out*' clk --interval 10
+  PYTHONPATH=../../tools python3 -m spiceflow.live tt_um_femto.raw --save live.png
+"""
+import argparse
+import re
+import time as _time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from .errors import SpiceflowError
+from .raw import RawFile
+
+DEFAULT_NODES = ("clk", "rst_n", "ui_in*", "uo_out*", "uio_in*", "uio_out*")
+MAX_BINS = 2000
+READ_CHUNK = 1 << 18      # puntos nuevos por lectura
+
+
+# ---------- DECIMACIÓN ----------
+class Decimator:
+    """
+    Resumen incremental de varias señales en intervalos de ancho fijo: mín, máx y último
+    valor de cada intervalo. Cuando hay más de max_bins intervalos el ancho se duplica y
+    se fusionan de a pares, así la memoria y el costo de dibujar no crecen con la corrida.
+    """
+    def __init__(self, n_signals, max_bins=MAX_BINS, width=None):
+        self.max_bins = max_bins
+        self.width = width
+        self.bins = np.zeros(0, dtype=np.int64)
+        self.vmin = np.zeros((0, n_signals))
+        self.vmax = np.zeros((0, n_signals))
+        self.last = np.zeros((0, n_signals))
+
+    def add(self, t, block):
+        """t: tiempos (n,), block: valores (n, señales) de los puntos nuevos."""
+        if not len(t):
+            return
+        if self.width is None:
+            span = float(t[-1] - t[0])
+            self.width = span / self.max_bins if span > 0 else 1e-12
+        idx = np.floor(t / self.width).astype(np.int64)
+        bins, vmin, vmax, last = self._reduce(idx, block, block, block)
+        if len(self.bins) and bins[0] == self.bins[-1]:
+            vmin[0] = np.minimum(vmin[0], self.vmin[-1])
+            vmax[0] = np.maximum(vmax[0], self.vmax[-1])
+            self.bins, self.vmin, self.vmax, self.last = (a[:-1] for a in (self.bins, self.vmin, self.vmax, self.last))
+        self.bins = np.concatenate([self.bins, bins])
+        self.vmin = np.concatenate([self.vmin, vmin])
+        self.vmax = np.concatenate([self.vmax, vmax])
+        self.last = np.concatenate([self.last, last])
+        while len(self.bins) > self.max_bins:
+            self.width *= 2
+            self.bins, self.vmin, self.vmax, self.last = self._reduce(self.bins // 2, self.vmin, self.vmax, self.last)
+
+    @staticmethod
+    def _reduce(idx, vmin, vmax, last):
+        """Agrupa filas con el mismo índice de intervalo (idx no decreciente)."""
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(idx)) + 1])
+        ends = np.concatenate([starts[1:], [len(idx)]]) - 1
+        return (idx[starts], np.minimum.reduceat(vmin, starts, axis=0),
+                np.maximum.reduceat(vmax, starts, axis=0), last[ends])
+
+    @property
+    def times(self):
+        return self.bins * self.width
+
+    def envelope(self, j):
+        """(x, y) para dibujar la señal j como envolvente mín/máx."""
+        x = np.repeat(self.times, 2)
+        y = np.stack([self.vmin[:, j], self.vmax[:, j]], axis=1).ravel()
+        return x, y
+
+
+# ---------- SEGUIMIENTO ----------
+def bus_groups(names):
+    """{'uo_out': [(bit, columna local), ...]} para nodos con forma prefijo[k]."""
+    groups = OrderedDict()
+    for j, name in enumerate(names):
+        m = re.fullmatch(r'(?:v\()?(.+?)\[(\d+)\]\)?', name, re.IGNORECASE)
+        if m:
+            groups.setdefault(m.group(1).lower(), []).append((int(m.group(2)), j))
+    return OrderedDict((k, sorted(v)) for k, v in groups.items() if len(v) > 1)
+
+
+def tran_stop(cir_path):
+    """Tiempo final del .tran del .cir (para el % de avance), o None."""
+    try:
+        for line in open(cir_path):
+            parts = line.split()
+            if parts and parts[0].lower() == ".tran" and len(parts) >= 3:
+                return float(parts[2])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class Follower:
+    """Lee incrementalmente un .raw que crece y alimenta un Decimator."""
+    def __init__(self, path, patterns=DEFAULT_NODES, max_bins=MAX_BINS):
+        self.raw = RawFile(path)
+        self.names = self.raw.match(patterns)
+        if not self.names:
+            raise SpiceflowError(f"ningún nodo de {self.raw.path.name} cumple {list(patterns)}")
+        self.cols = [self.raw.index(n) for n in self.names]
+        self.dec = Decimator(len(self.cols), max_bins)
+        self.buses = bus_groups(self.names)
+        self.done = 0           # puntos ya leídos
+
+    def poll(self):
+        """Lee los puntos agregados desde la última vez; devuelve cuántos."""
+        n = self.raw.refresh()
+        start = self.done
+        for a in range(start, n, READ_CHUNK):
+            b = min(a + READ_CHUNK, n)
+            t = np.abs(self.raw.column(0, a, b))
+            block = np.stack([self.raw.column(c, a, b) for c in self.cols], axis=1)
+            self.dec.add(t, block)
+        self.done = n
+        return n - start
+
+    @property
+    def sim_time(self):
+        return float(abs(self.raw.column(0, self.done - 1, self.done)[0])) if self.done else 0.0
+
+    def bus_values(self, vdd):
+        """{bus: (tiempos, valor entero por intervalo)} a partir del último valor de cada intervalo."""
+        out = OrderedDict()
+        bits = self.dec.last > vdd / 2
+        for bus, members in self.buses.items():
+            value = np.zeros(len(bits), dtype=np.int64)
+            for k, j in members:
+                value |= bits[:, j].astype(np.int64) << k
+            out[bus] = (self.dec.times, value)
+        return out
+
+
+# ---------- GRÁFICA ----------
+def setup_figure(follower):
+    import matplotlib.pyplot as plt
+    n_bus = len(follower.buses)
+    fig, (ax_sig, ax_bus) = plt.subplots(2, 1, figsize=(14, 10), sharex=True,
+                                         gridspec_kw={"height_ratios": [3, 1 if n_bus else 0.01]})
+    lines = [ax_sig.plot([], [], linewidth=1.2, label=name)[0] for name in follower.names]
+    ax_sig.set_ylabel('Voltage (V) with offset', fontsize=11)
+    ax_sig.grid(True, which='both', linestyle='--', linewidth=0.4, alpha=0.5)
+    ax_sig.set_yticks([])
+    bus_lines = [ax_bus.step([], [], where='post', linewidth=1.5, label=bus)[0] for bus in follower.buses]
+    if n_bus:
+        ax_bus.legend(loc='upper left', fontsize=8)
+    ax_bus.set_ylabel('Bus (decimal)', fontsize=11)
+    ax_bus.set_xlabel('Time (s)', fontsize=11)
+    ax_bus.grid(True, linestyle='--', linewidth=0.4, alpha=0.5)
+    return plt, fig, (ax_sig, ax_bus), lines, bus_lines
+
+
+def redraw(follower, fig, axes, lines, bus_lines, vdd, stop, rate):
+    ax_sig, ax_bus = axes
+    offset = vdd * 1.3
+    dec = follower.dec
+    labels = []
+    for j, line in enumerate(lines):
+        x, y = dec.envelope(j)
+        line.set_data(x, y + j * offset)
+        labels.append((j * offset + vdd / 2, follower.names[j]))
+    ax_sig.set_yticks([p for p, _ in labels])
+    ax_sig.set_yticklabels([n for _, n in labels], fontsize=8)
+    ax_sig.set_ylim(-0.5, len(lines) * offset)
+
+    values = follower.bus_values(vdd)
+    now = []
+    for line, (bus, (t, v)) in zip(bus_lines, values.items()):
+        line.set_data(t, v)
+        if len(v):
+            now.append(f"{bus}=0x{int(v[-1]):X}")
+    if values:
+        ax_bus.relim()
+        ax_bus.autoscale_view(scalex=False)
+    t_end = follower.sim_time
+    ax_sig.set_xlim(0, max(t_end, stop or 0) or 1e-12)
+
+    progress = f" ({100 * t_end / stop:.1f} % de {stop:.3g} s)" if stop else ""
+    fig.suptitle(f"{follower.raw.path.name}: t = {t_end:.6g} s{progress}, {follower.done} puntos, "
+                 f"{rate:.0f} puntos/s\n" + "  ".join(now), fontsize=11, fontweight='bold')
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Grafica un .raw mientras el simulador lo escribe")
+    ap.add_argument("raw")
+    ap.add_argument("--nodes", nargs="+", default=list(DEFAULT_NODES), help="nodos o patrones glob")
+    ap.add_argument("--vdd", type=float, default=3.3)
+    ap.add_argument("--interval", type=float, default=5.0, help="segundos entre actualizaciones")
+    ap.add_argument("--cir", help="netlist con el .tran (default: <raw>.cir) para el % de avance")
+    ap.add_argument("--bins", type=int, default=MAX_BINS, help="intervalos de la decimación")
+    ap.add_argument("--save", help="escribir la gráfica a este archivo en cada actualización (sin ventana)")
+    ap.add_argument("--updates", type=int, help="terminar después de N actualizaciones")
+    args = ap.parse_args()
+
+    raw_path = Path(args.raw)
+    while True:                         # Xyce crea el .raw al empezar; el encabezado puede tardar
+        try:
+            follower = Follower(raw_path, args.nodes, args.bins)
+            break
+        except SpiceflowError as e:     # es un ValueError: va antes que la espera del encabezado
+            raise SystemExit(f"ERROR: {e}")
+        except (FileNotFoundError, ValueError):
+            print(f"Esperando {raw_path} ...")
+            _time.sleep(args.interval)
+    stop = tran_stop(args.cir or raw_path.with_suffix(".cir"))
+
+    if args.save:
+        import matplotlib
+        matplotlib.use("Agg")
+    plt, fig, axes, lines, bus_lines = setup_figure(follower)
+    if not args.save:
+        plt.ion()
+        plt.show()
+
+    count, last_t = 0, _time.monotonic()
+    while True:
+        new = follower.poll()
+        now = _time.monotonic()
+        rate = new / max(now - last_t, 1e-9)
+        last_t = now
+        redraw(follower, fig, axes, lines, bus_lines, args.vdd, stop, rate)
+        print(f"t = {follower.sim_time:.6g} s  +{new} puntos ({follower.done} en total)")
+        if args.save:
+            fig.savefig(args.save, dpi=100)
+        count += 1
+        if args.updates and count >= args.updates:
+            break
+        if args.save:
+            _time.sleep(args.interval)
+        else:
+            if not plt.fignum_exists(fig.number):
+                break
+            plt.pause(args.interval)
+    if args.save:
+        print(f"Wrote: {args.save}")
@@ -0,0 +1,116 @@
+"""
+mapping.py
+Mapeo por diseño de señales/buses del .tim a nodos SPICE (tim_map.json o tim_map.yaml
+junto al Makefile de cada flujo). Ejemplo (mult_4):
+  {
+    "vdd": 3.3,
+    "signals": {"clk": "clk", "init": "uio_in[0]", "rst_n": "rst_n"},
+    "buses": {"A[3:0]": {"node": "ui_in", "lsb": 0},
+              "B[3:0]": {"node": "ui_in", "lsb": 4}},
+    "other_signals": true,
+    "other_buses": false,
+    "operations": {"start": "uio_in[0]:rise", "stop": "uio_out[0]:rise"}
+  }
+El bit k (LSB = 0) de un bus mapeado maneja el nodo node[lsb + k]. Las señales/buses
+sin mapeo se conservan con su propio nombre si other_signals / other_buses son true;
+un bus "x[7:0]" sin mapeo se expande a x[0]..x[7].
+min_pulse [s] (default: el epsilon del .tim) y pulse_mode ("drop" | "stretch") controlan
+el filtro de pulsos cortos de pwl.filter_pulses. probe_current agrega i(Vvdd) al .print
+del .cir; operations define las ventanas de power.py (flanco de inicio y, opcional, de
+fin; sin fin cada ventana llega al siguiente inicio).
+"""
+import json
+import re
+from pathlib import Path
+
+from .errors import SpiceflowError
+
+MAP_NAMES = ("tim_map.json", "tim_map.yaml", "tim_map.yml")
+
+DEFAULTS = {
+    "vdd": 3.3,
+    "lib": "/usr/local/share/pdk/sky130A/libs.tech/ngspice/sky130.lib.spice tt",
+    "signals": {},
+    "buses": {},
+    "other_signals": True,
+    "other_buses": True,
+    "min_pulse": None,
+    "pulse_mode": "drop",
+    "probe_current": False,
+    "operations": None,
+}
+
+
+def load_mapping(path=None):
+    """Lee un mapeo JSON/YAML (YAML requiere PyYAML); sin path devuelve el genérico."""
+    cfg = dict(DEFAULTS)
+    if path is None:
+        return cfg
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise SpiceflowError(f"{path} es YAML y PyYAML no está instalado (pip install pyyaml)")
+        data = yaml.safe_load(text) or {}
+    else:
+        data = json.loads(text)
+    unknown = set(data) - set(DEFAULTS)
+    if unknown:
+        raise SpiceflowError(f"{path}: claves desconocidas {sorted(unknown)}")
+    cfg.update(data)
+    return cfg
+
+
+def find_mapping(*dirs):
+    """Primer tim_map.{json,yaml,yml} en dirs, o None."""
+    for d in dirs:
+        for name in MAP_NAMES:
+            p = Path(d) / name
+            if p.exists():
+                return p
+    return None
+
+
+def bus_range(bus_name):
+    """'ui_in[7:0]' -> ('ui_in', 7, 0); sin rango -> (bus_name, None, None)."""
+    m = re.match(r'^(.*)\[(\d+):(\d+)\]$', bus_name)
+    if not m:
+        return bus_name, None, None
+    return m.group(1), int(m.group(2)), int(m.group(3))
+
+
+def bus_bit_nodes(bus_name, digits, cfg):
+    """
+    Lista de (k, nodo) para cada bit k (LSB = 0) del bus, o [] si el bus no se usa.
+    """
+    prefix, hi, lo = bus_range(bus_name)
+    if hi is not None:
+        width = abs(hi - lo) + 1
+    else:
+        width = max(1, digits * 4)
+
+    if bus_name in cfg["buses"]:
+        entry = cfg["buses"][bus_name]
+        width = entry.get("width", width)
+        return [(k, f"{entry['node']}[{entry.get('lsb', 0) + k}]") for k in range(width)]
+    if not cfg["other_buses"]:
+        return []
+    if hi is not None:
+        return [(k, f"{prefix}[{min(hi, lo) + k}]") for k in range(width)]
+    return [(k, f"{bus_name}[{k}]") for k in range(width)]
+
+
+def signal_node(name, cfg):
+    """Nodo que maneja la señal, o None si no se usa."""
+    if name in cfg["signals"]:
+        return cfg["signals"][name]
+    return name if cfg["other_signals"] else None
+
+
+def source_name(node):
+    """Nombre de la fuente: V_<nodo> (V_ui_in[3]); caracteres raros se cambian por '_'."""
+    if re.fullmatch(r'\w+(\[\d+\])?', node):
+        return f"V_{node}"
+    return "V_" + re.sub(r'[^\w]', '_', node)
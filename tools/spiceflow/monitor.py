@@ -0,0 +1,254 @@
+"""
+monitor.py
+Envuelve la corrida del simulador (mpirun ... Xyce x.cir) y muestra cada pocos segundos
+el avance: tiempo simulado contra el stop del .tran, throughput (ns simulados por
+segundo de reloj), ETA y estadísticas del paso de tiempo (los puntos aceptados que el
+simulador va agregando al .raw). El tiempo simulado sale de la salida del simulador
+("Percent complete", "Current simulation time"...) y, si existe, del propio .raw que crece.
+Todo se guarda en <cir>.progress.csv; al terminar se listan los tramos de tiempo
+simulado más lentos (donde el estímulo frena al solver).
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.monitor -- mpirun -np 4 Xyce tt_um_femto.cir
+  PYTHONPATH=../../tools python3 -m spiceflow.monitor --interval 30 --stall 600 -- Xyce tt_um_mult_4.cir
+  PYTHONPATH=../../tools python3 -m spiceflow.monitor --summary tt_um_femto.progress.csv
+"""
+import argparse
+import csv
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .live import tran_stop
+from .raw import RawFile
+
+FIELDS = ["wall_s", "sim_time_s", "percent", "rate_ns_per_s", "eta_s", "steps", "dt_min_s", "dt_mean_s", "dt_max_s"]
+
+# Xyce / ngspice; el primer grupo es el número
+PATTERNS = {
+    "percent": re.compile(r'Percent complete:\s*([0-9.eE+-]+)', re.IGNORECASE),
+    "time": re.compile(r'(?:Current (?:simulation )?time|Reference value)\s*[:=]\s*([0-9.eE+-]+)', re.IGNORECASE),
+    "dt": re.compile(r'(?:time ?step|step size)\s*[:=]\s*([0-9.eE+-]+)', re.IGNORECASE),
+}
+
+
+def raw_path_for(cir_path):
+    """Archivo del .print tran ... file=X.raw del .cir (default: <cir>.raw)."""
+    cir_path = Path(cir_path)
+    try:
+        m = re.search(r'^\.print\s+tran\b.*\bfile=(\S+)', cir_path.read_text(errors="replace"),
+                      re.IGNORECASE | re.MULTILINE)
+        if m:
+            return cir_path.parent / m.group(1)
+    except OSError:
+        pass
+    return cir_path.with_suffix(".raw")
+
+
+def fmt_seconds(s):
+    if s is None or not np.isfinite(s):
+        return "?"
+    s = int(s)
+    return f"{s // 3600}h{s % 3600 // 60:02d}m{s % 60:02d}s" if s >= 3600 else f"{s // 60}m{s % 60:02d}s"
+
+
+# ---------- SEGUIMIENTO ----------
+class Progress:
+    """Estado del avance, alimentado por la salida del simulador y por el .raw."""
+    def __init__(self, stop, raw_path=None, window=6):
+        self.stop = stop
+        self.raw_path = raw_path
+        self.raw = None
+        self.raw_done = 0
+        self.sim_time = 0.0
+        self.percent = None
+        self.last_dt = None
+        self.window = window
+        self.samples = [(0.0, 0.0)]     # (wall, sim_time)
+        self.lock = threading.Lock()
+
+    def feed_line(self, line):
+        with self.lock:
+            for key, pat in PATTERNS.items():
+                m = pat.search(line)
+                if not m:
+                    continue
+                try:
+                    value = float(m.group(1))
+                except ValueError:
+                    continue
+                if key == "percent":
+                    self.percent = value
+                    if self.stop:
+                        self.sim_time = max(self.sim_time, self.stop * value / 100)
+                elif key == "time":
+                    self.sim_time = max(self.sim_time, value)
+                else:
+                    self.last_dt = value
+
+    def poll_raw(self):
+        """Pasos aceptados nuevos en el .raw: (cantidad, dt mín, medio, máx)."""
+        if self.raw is None:
+            if not self.raw_path or not Path(self.raw_path).exists():
+                return 0, None, None, None
+            try:
+                self.raw = RawFile(self.raw_path)
+            except ValueError:          # encabezado aún incompleto
+                return 0, None, None, None
+        n = self.raw.refresh()
+        if n <= self.raw_done:
+            return 0, None, None, None
+        t = np.abs(self.raw.column(0, max(self.raw_done - 1, 0), n))
+        self.raw_done = n
+        with self.lock:
+            self.sim_time = max(self.sim_time, float(t[-1]))
+        dt = np.diff(t)
+        dt = dt[dt > 0]
+        if not len(dt):
+            return len(t), None, None, None
+        return len(dt), float(dt.min()), float(dt.mean()), float(dt.max())
+
+    def sample(self, wall):
+        """Agrega una muestra; devuelve (tiempo simulado, ns/s en la ventana reciente, ETA [s])."""
+        with self.lock:
+            sim = self.sim_time
+        self.samples.append((wall, sim))
+        recent = self.samples[-self.window - 1:]
+        d_wall = recent[-1][0] - recent[0][0]
+        d_sim = recent[-1][1] - recent[0][1]
+        rate = d_sim / d_wall if d_wall > 0 else 0.0
+        eta = (self.stop - sim) / rate if self.stop and rate > 0 else None
+        return sim, rate * 1e9, eta
+
+
+def monitor(cmd, cir=None, interval=5.0, stall=None, progress_csv=None, log_path=None, quiet=False):
+    """Corre cmd y registra el avance; devuelve el código de salida del simulador."""
+    cir = cir or next((a for a in cmd if a.lower().endswith(".cir")), None)
+    stop = tran_stop(cir) if cir else None
+    raw_path = raw_path_for(cir) if cir else None
+    if cir and not progress_csv:
+        progress_csv = Path(cir).with_suffix(".progress.csv")
+    if cir and not log_path:
+        log_path = Path(cir).with_suffix(".sim.log")
+    prog = Progress(stop, raw_path)
+
+    print(f"Monitor: {' '.join(cmd)}")
+    print(f"  .tran stop: {stop if stop else '?'} s   raw: {raw_path or '-'}   progreso: {progress_csv}")
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    log = open(log_path, "w") if log_path else None
+
+    def reader():
+        for line in proc.stdout:
+            prog.feed_line(line)
+            if log:
+                log.write(line)
+            if not quiet:
+                sys.stdout.write("  | " + line)
+
+    th = threading.Thread(target=reader, daemon=True)
+    th.start()
+
+    out = open(progress_csv, "w", newline="") if progress_csv else None
+    writer = csv.DictWriter(out, fieldnames=FIELDS) if out else None
+    if writer:
+        writer.writeheader()
+    t0 = time.monotonic()
+    last_advance, last_sim = t0, 0.0
+    try:
+        while True:
+            finished = proc.poll() is not None
+            if not finished:
+                try:
+                    proc.wait(timeout=interval)
+                    finished = True
+                except subprocess.TimeoutExpired:
+                    pass
+            if finished:
+                th.join(timeout=5)
+            steps, dt_min, dt_mean, dt_max = prog.poll_raw()
+            now = time.monotonic()
+            sim, rate, eta = prog.sample(now - t0)
+            pct = 100 * sim / stop if stop else prog.percent
+            row = {"wall_s": round(now - t0, 3), "sim_time_s": sim, "percent": pct, "rate_ns_per_s": rate,
+                   "eta_s": eta, "steps": steps, "dt_min_s": dt_min, "dt_mean_s": dt_mean, "dt_max_s": dt_max}
+            if writer:
+                writer.writerow(row)
+                out.flush()
+            dt_txt = f"dt {dt_min:.3g}/{dt_mean:.3g}/{dt_max:.3g} s ({steps} pasos)" if dt_mean else \
+                (f"dt {prog.last_dt:.3g} s" if prog.last_dt else "")
+            pct_txt = f"{pct:6.2f} %" if pct is not None else "   ? %"
+            print(f"[{fmt_seconds(now - t0):>9}] t = {sim:.6g} s  {pct_txt}  {rate:9.3f} ns/s  "
+                  f"ETA {fmt_seconds(eta)}  {dt_txt}")
+            if sim > last_sim:
+                last_advance, last_sim = now, sim
+            elif stall and now - last_advance > stall and not finished:
+                print(f"  ! sin avance desde hace {fmt_seconds(now - last_advance)} en t = {sim:.6g} s")
+            if finished:
+                break
+    except KeyboardInterrupt:
+        proc.terminate()
+        proc.wait()
+    finally:
+        if out:
+            out.close()
+        if log:
+            log.close()
+    rc = proc.returncode
+    print(f"Simulador terminó con código {rc} en {fmt_seconds(time.monotonic() - t0)}")
+    if progress_csv:
+        print(f"Wrote: {progress_csv}")
+        summary(progress_csv)
+    return rc
+
+
+# ---------- RESUMEN ----------
+def load_progress(path):
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    cols = {k: np.array([float(r[k]) if r[k] not in ("", "None") else np.nan for r in rows]) for k in FIELDS}
+    return cols
+
+
+def summary(path, top=5):
+    """Throughput medio y los tramos de tiempo simulado con menor throughput."""
+    p = load_progress(path)
+    wall, sim = p["wall_s"], p["sim_time_s"]
+    if len(wall) < 2 or wall[-1] <= 0:
+        return []
+    print(f"\nThroughput medio: {1e9 * sim[-1] / wall[-1]:.3f} ns/s ({sim[-1]:.6g} s en {fmt_seconds(wall[-1])})")
+    d_wall, d_sim = np.diff(wall), np.diff(sim)
+    rate = np.where(d_wall > 0, d_sim / np.maximum(d_wall, 1e-12), np.nan) * 1e9
+    order = [i for i in np.argsort(np.nan_to_num(rate, nan=np.inf)) if d_wall[i] > 0][:top]
+    slow = [{"sim_from_s": float(sim[i]), "sim_to_s": float(sim[i + 1]), "wall_s": float(d_wall[i]),
+             "rate_ns_per_s": float(rate[i])} for i in order]
+    if slow:
+        print("Tramos más lentos (tiempo simulado):")
+        for s in slow:
+            print(f"  {s['sim_from_s']:.6g} .. {s['sim_to_s']:.6g} s: {s['rate_ns_per_s']:.3f} ns/s "
+                  f"durante {fmt_seconds(s['wall_s'])}")
+    return slow
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Avance, throughput y ETA de una simulación")
+    ap.add_argument("--cir", help="netlist (default: el .cir del comando)")
+    ap.add_argument("--interval", type=float, default=5.0, help="segundos entre muestras")
+    ap.add_argument("--stall", type=float, help="avisar si el tiempo simulado no avanza en N segundos")
+    ap.add_argument("--progress", help="CSV de avance (default: <cir>.progress.csv)")
+    ap.add_argument("--quiet", action="store_true", help="no repetir la salida del simulador (queda en <cir>.sim.log)")
+    ap.add_argument("--summary", metavar="CSV", help="solo resumir un CSV de avance ya guardado")
+    ap.add_argument("cmd", nargs=argparse.REMAINDER, help="-- comando del simulador")
+    args = ap.parse_args()
+
+    if args.summary:
+        summary(args.summary)
+        sys.exit(0)
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        ap.error("falta el comando del simulador (después de --)")
+    sys.exit(monitor(cmd, args.cir, args.interval, args.stall, args.progress, quiet=args.quiet))
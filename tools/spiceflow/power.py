@@ -0,0 +1,210 @@
+"""
+power.py
+Energía por operación a partir de la corriente de alimentación de una corrida post-layout.
+El .cir debe guardar i(Vvdd) (conversor con --probe-current o "probe_current": true en
+tim_map.json). P(t) = -I(Vvdd)·VDD (la fuente entrega corriente, I(Vvdd) < 0) y la energía
+de cada ventana sale de la integral trapezoidal acumulada, calculada por bloques sobre
+el .raw mapeado en memoria (no se carga completo).
+Las ventanas (operaciones) se definen con flancos de nodos digitalizados del .raw:
+  mult_4:  init -> done        --start 'uio_in[0]:rise' --stop 'uio_out[0]:rise'
+  femtoRV: una ventana por transacción de la flash SPI (cada fetch de instrucción):
+                               --start 'uo_out[2]:fall'
+o con un CSV (start_s,stop_s[,label]). Sin argumentos se usa "operations" del tim_map.json.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.power tt_um_mult_4.raw
+  PYTHONPATH=../../tools python3 -m spiceflow.power tt_um_femto.raw --start 'uo_out[2]:fall' --csv power.csv
+"""
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import numpy as np
+
+from .activity import RAW_CHUNK, raw_edges
+from .errors import SpiceflowError
+from .mapping import find_mapping, load_mapping
+from .raw import RawFile
+
+SUPPLY = "Vvdd"
+
+
+# ---------- VENTANAS ----------
+def parse_event(spec):
+    """'uio_out[0]:rise' -> ('uio_out[0]', 1); sin sufijo = flanco de subida."""
+    node, _, edge = spec.rpartition(":") if spec.endswith((":rise", ":fall")) else (spec, "", "rise")
+    return node, 1 if edge == "rise" else 0
+
+
+def event_times(raw, spec, vdd):
+    node, level = parse_event(spec)
+    edges = raw_edges(raw, [node], vdd)
+    if not edges:
+        raise SpiceflowError(f"{node} no está en {raw.path.name}")
+    t, lv = next(iter(edges.values()))
+    return t[lv == level]
+
+
+def event_windows(raw, start, stop=None, vdd=3.3):
+    """
+    (starts, stops) en s. Con stop: cada inicio hasta el primer evento de fin posterior
+    (se descartan inicios sin fin). Sin stop: de cada inicio al siguiente.
+    """
+    t0 = event_times(raw, start, vdd)
+    if stop is None:
+        return t0[:-1], t0[1:]
+    t1 = event_times(raw, stop, vdd)
+    idx = np.searchsorted(t1, t0, side="right")
+    ok = idx < len(t1)
+    return t0[ok], t1[idx[ok]]
+
+
+def csv_windows(path):
+    """CSV con start_s,stop_s[,label] (encabezado opcional)."""
+    starts, stops, labels = [], [], []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                a, b = float(row[0]), float(row[1])
+            except (ValueError, IndexError):
+                continue
+            starts.append(a)
+            stops.append(b)
+            labels.append(row[2] if len(row) > 2 else "")
+    return np.array(starts), np.array(stops), labels
+
+
+# ---------- ENERGÍA ----------
+def supply_column(raw, source=SUPPLY):
+    name = f"i({source})"
+    if name not in raw:
+        raise SpiceflowError(f"{raw.path.name} no tiene {name}; regenere el .cir con --probe-current")
+    return raw.index(name)
+
+
+def window_energy(raw, starts, stops, vdd, source=SUPPLY, chunk=RAW_CHUNK):
+    """
+    Energía [J] y potencia pico [W] de cada ventana [starts[i], stops[i]].
+    La energía es E(stop) - E(start) con E la integral trapezoidal acumulada de P(t),
+    interpolada en los instantes de los eventos; el pico es el máximo de P en las
+    muestras dentro de la ventana (reduceat por bloque).
+    """
+    col = supply_column(raw, source)
+    starts, stops = np.asarray(starts, dtype=np.float64), np.asarray(stops, dtype=np.float64)
+    e_start = np.full(len(starts), np.nan)
+    e_stop = np.full(len(stops), np.nan)
+    peak = np.full(len(starts), -np.inf)
+    carry_e, last = 0.0, None
+
+    for a in range(0, raw.n_points, chunk):
+        b = min(a + chunk, raw.n_points)
+        t = np.abs(raw.column(0, a, b))
+        p = -raw.column(col, a, b) * vdd
+        if last is not None:                  # continuar el trapecio desde el bloque anterior
+            t = np.concatenate([[last[0]], t])
+            p = np.concatenate([[last[1]], p])
+        e = np.empty(len(t))
+        e[0] = carry_e
+        np.cumsum(0.5 * (p[1:] + p[:-1]) * np.diff(t), out=e[1:])
+        e[1:] += carry_e
+
+        for ev, out in ((starts, e_start), (stops, e_stop)):
+            m = (ev >= t[0]) & (ev <= t[-1])
+            out[m] = np.interp(ev[m], t, e)
+
+        i0 = np.searchsorted(t, starts, side="left")
+        i1 = np.searchsorted(t, stops, side="right")
+        has = i1 > i0
+        if has.any():
+            pp = np.append(p, -np.inf)        # centinela: reduceat necesita índices < len
+            r = np.maximum.reduceat(pp, np.stack([i0[has], i1[has]], axis=1).ravel())[::2]
+            peak[has] = np.maximum(peak[has], r)
+        carry_e, last = float(e[-1]), (t[-1], p[-1])
+    return e_stop - e_start, peak
+
+
+def energy_report(raw, starts, stops, vdd, labels=None, source=SUPPLY):
+    energy, peak = window_energy(raw, starts, stops, vdd, source)
+    duration = stops - starts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg = np.where(duration > 0, energy / duration, np.nan)
+    ops = []
+    for i in range(len(starts)):
+        ops.append({"op": i, "label": labels[i] if labels else "", "start_s": float(starts[i]),
+                    "stop_s": float(stops[i]), "duration_s": float(duration[i]),
+                    "energy_J": float(energy[i]), "avg_power_W": float(avg[i]),
+                    "peak_power_W": float(peak[i]) if np.isfinite(peak[i]) else None})
+    valid = energy[np.isfinite(energy)]
+    summary = {"operations": len(ops), "vdd": vdd, "supply": source}
+    if len(valid):
+        summary.update({"energy_mean_J": float(valid.mean()), "energy_min_J": float(valid.min()),
+                        "energy_max_J": float(valid.max()), "energy_total_J": float(valid.sum())})
+    return {"summary": summary, "operations": ops}
+
+
+def print_report(rep, limit=20):
+    ops = rep["operations"]
+    print(f"{'op':>5} {'label':<12} {'start [ns]':>12} {'dur [ns]':>10} {'E [pJ]':>10} "
+          f"{'Pavg [uW]':>10} {'Ppeak [uW]':>11}")
+    for o in ops[:limit]:
+        pk = f"{o['peak_power_W'] * 1e6:11.2f}" if o["peak_power_W"] is not None else f"{'-':>11}"
+        print(f"{o['op']:5d} {o['label'][:12]:<12} {o['start_s'] * 1e9:12.3f} {o['duration_s'] * 1e9:10.3f} "
+              f"{o['energy_J'] * 1e12:10.3f} {o['avg_power_W'] * 1e6:10.2f} {pk}")
+    if len(ops) > limit:
+        print(f"  ... {len(ops) - limit} operaciones más (ver --csv / --json)")
+    s = rep["summary"]
+    if "energy_mean_J" in s:
+        print(f"\n{s['operations']} operaciones @ VDD={s['vdd']} V: energía media {s['energy_mean_J'] * 1e12:.3f} pJ "
+              f"(min {s['energy_min_J'] * 1e12:.3f}, max {s['energy_max_J'] * 1e12:.3f}), "
+              f"total {s['energy_total_J'] * 1e12:.3f} pJ")
+    else:
+        print("No se encontraron operaciones completas.")
+
+
+def write_csv(path, rep):
+    fields = ["op", "label", "start_s", "stop_s", "duration_s", "energy_J", "avg_power_W", "peak_power_W"]
+    with open(path, "w", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerows(rep["operations"])
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Energía y potencia por operación desde i(Vvdd) de un .raw")
+    ap.add_argument("raw")
+    ap.add_argument("--map", help="mapeo del diseño (default: tim_map.json junto al .raw)")
+    ap.add_argument("--start", help="evento de inicio, p.e. 'uio_in[0]:rise'")
+    ap.add_argument("--stop", help="evento de fin, p.e. 'uio_out[0]:rise' (sin él: hasta el siguiente inicio)")
+    ap.add_argument("--windows", help="CSV start_s,stop_s[,label] en lugar de eventos")
+    ap.add_argument("--vdd", type=float, help="tensión de alimentación (default: la del mapeo)")
+    ap.add_argument("--supply", default=SUPPLY, help="fuente de alimentación a medir")
+    ap.add_argument("--csv", help="guardar una fila por operación")
+    ap.add_argument("--json", help="guardar el reporte completo")
+    args = ap.parse_args()
+
+    try:
+        cfg = load_mapping(args.map or find_mapping(Path(args.raw).parent, Path.cwd()))
+        vdd = args.vdd or cfg["vdd"]
+        raw = RawFile(args.raw)
+        labels = None
+        if args.windows:
+            starts, stops, labels = csv_windows(args.windows)
+        else:
+            ops = cfg["operations"] or {}
+            start, stop = args.start or ops.get("start"), args.stop or ops.get("stop")
+            if not start:
+                ap.error("indique --start/--stop, --windows u \"operations\" en tim_map.json")
+            starts, stops = event_windows(raw, start, stop, vdd)
+
+        rep = energy_report(raw, starts, stops, vdd, labels, args.supply)
+    except SpiceflowError as e:
+        raise SystemExit(f"ERROR: {e}")
+    print_report(rep)
+    if args.csv:
+        write_csv(args.csv, rep)
+        print(f"Wrote: {args.csv}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rep, f, indent=2)
+        print(f"Wrote: {args.json}")
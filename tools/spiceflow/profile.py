@@ -0,0 +1,53 @@
+"""
+profile.py
+Tiempo (perf_counter) y pico de memoria (tracemalloc) acumulados por etapa.
+"""
+import time
+import tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+
+class StageProfiler:
+    """
+    Acumula por etapa (parse, buses, pwl, write, ...) el tiempo, las llamadas y el
+    pico de memoria. tracemalloc frena bastante el código: memory=False para medir
+    solo tiempos.
+    """
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.stages = OrderedDict()   # etapa -> {'time': s, 'peak': bytes, 'calls': n}
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        st = self.stages.setdefault(name, {'time': 0.0, 'peak': 0, 'calls': 0})
+        if self.memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            st['time'] += time.perf_counter() - t0
+            st['calls'] += 1
+            if self.memory:
+                st['peak'] = max(st['peak'], tracemalloc.get_traced_memory()[1] - base)
+
+    def close(self):
+        """Detiene tracemalloc (no debe quedar activo para rondas cronometradas)."""
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def report(self):
+        total = sum(st['time'] for st in self.stages.values()) or 1.0
+        print(f"{'stage':<10} {'time [s]':>10} {'%':>6} {'peak [MiB]':>11} {'calls':>7}")
+        for name, st in self.stages.items():
+            peak = f"{st['peak'] / 2**20:11.2f}" if self.memory else f"{'-':>11}"
+            print(f"{name:<10} {st['time']:10.4f} {100 * st['time'] / total:6.1f} {peak} {st['calls']:7d}")
+
+
+def stage(profiler, name):
+    """profiler.stage(name), o un contexto vacío si no hay profiler."""
+    return profiler.stage(name) if profiler else nullcontext()
@@ -0,0 +1,128 @@
+"""
+pwl.py
+Núcleo vectorizado: flancos -> puntos PWL tipo square y bus -> bits.
+Trabaja sobre las trazas normalizadas de tim.tim_traces / stim.py: values[0] es el
+nivel inicial y values[i + 1] el nivel tras el flanco times[i]. Los niveles se manejan
+como 0/1 (int8); el voltaje se aplica al escribir.
+filter_pulses quita (mode="drop") o ensancha (mode="stretch") los pulsos más cortos
+que min_pulse antes de armar el PWL, para no forzar al simulador a pasos diminutos.
+"""
+import numpy as np
+
+EPSILON_FACTOR = 1e-3   # epsilon ~ EPSILON_FACTOR * time_scale
+MIN_EPS = 1e-12         # eps mínimo absoluto
+SAME_TIME = 1e-18       # dos puntos más cercanos que esto son el mismo instante
+PULSE_MODES = ("drop", "stretch")
+
+
+def epsilon_for(time_scale):
+    return max(time_scale * EPSILON_FACTOR, MIN_EPS)
+
+
+def pwl_points(times, levels, eps):
+    """
+    times: instantes [s] ordenados; levels: nivel inicial + nivel tras cada flanco.
+    Devuelve (t, nivel) con un punto de hold en t - eps antes de cada transición neta.
+    Mismo resultado que build_pwl_from_points de los scripts originales.
+    """
+    levels = np.asarray(levels, dtype=np.int8)
+    start = levels[0]
+    change = levels[1:] != levels[:-1]
+    t = np.asarray(times, dtype=np.float64)[change]
+    v = levels[1:][change]
+    n = len(t)
+    if n == 0:
+        return np.zeros(1), np.array([start], dtype=np.int8)
+
+    v_before = np.empty(n, dtype=np.int8)
+    v_before[0] = start
+    v_before[1:] = v[:-1]
+    t_before = np.empty(n)
+    t_before[0] = 0.0
+    t_before[1:] = t[:-1]
+    # el hold en t - eps no puede quedar antes del flanco anterior (tiempos monótonos)
+    t_pre = np.maximum(t_before, t - eps)
+    keep_pre = t_pre - t_before >= SAME_TIME
+
+    out_t = np.empty(2 * n + 1)
+    out_v = np.empty(2 * n + 1, dtype=np.int8)
+    out_t[0], out_v[0] = 0.0, start
+    out_t[1::2], out_v[1::2] = t_pre, v_before
+    out_t[2::2], out_v[2::2] = t, v
+    keep = np.ones(2 * n + 1, dtype=bool)
+    keep[1::2] = keep_pre
+    return out_t[keep], out_v[keep]
+
+
+def _drop_short(t, v, min_pulse):
+    """Quita pares de transiciones separadas menos de min_pulse; devuelve (t, v, pulsos)."""
+    dropped = 0
+    while len(t) > 1:
+        short = np.diff(t) < min_pulse
+        if not short.any():
+            break
+        # en cada racha de gaps cortos se toman los de posición par dentro de la racha
+        idx = np.arange(len(short))
+        first = short & ~np.concatenate([[False], short[:-1]])
+        run_start = np.maximum.accumulate(np.where(first, idx, 0))
+        pick = np.flatnonzero(short & ((idx - run_start) % 2 == 0))
+        keep = np.ones(len(t), dtype=bool)
+        keep[pick] = False
+        keep[pick + 1] = False
+        t, v = t[keep], v[keep]
+        dropped += len(pick)
+    return t, v, dropped
+
+
+def filter_pulses(times, levels, min_pulse, mode="drop", eps=0.0):
+    """
+    times/levels como en pwl_points. Devuelve (times, levels, stats) solo con transiciones
+    netas y sin pulsos más cortos que min_pulse:
+      drop:    el pulso corto desaparece (sus dos flancos), como un retardo inercial;
+               en una ráfaga se quitan pares alternados hasta que no queden pulsos cortos.
+      stretch: cada flanco se atrasa lo necesario para que ningún pulso mida menos de
+               min_pulse: t'_k = max(t_k, t'_(k-1) + min_pulse) (los siguientes se corren);
+               antes se quitan los pulsos de ancho cero (flancos simultáneos).
+    stats: {"dropped": pulsos quitados, "stretched": flancos movidos, "max_shift": s,
+            "close": transiciones a menos de eps de la anterior (su hold se ajusta)}.
+    """
+    if mode not in PULSE_MODES:
+        raise ValueError(f"pulse mode {mode!r} (use {'/'.join(PULSE_MODES)})")
+    levels = np.asarray(levels, dtype=np.int8)
+    change = levels[1:] != levels[:-1]
+    t = np.asarray(times, dtype=np.float64)[change]
+    v = levels[1:][change]
+    start = levels[0]
+    stats = {"dropped": 0, "stretched": 0, "max_shift": 0.0, "close": 0}
+
+    if min_pulse and min_pulse > 0 and len(t) > 1:
+        if mode == "drop":
+            t, v, stats["dropped"] = _drop_short(t, v, min_pulse)
+        else:
+            # flancos simultáneos no son un pulso: se quitan antes de ensanchar
+            t, v, stats["dropped"] = _drop_short(t, v, SAME_TIME)
+            k = np.arange(len(t)) * min_pulse
+            t_new = np.maximum.accumulate(t - k) + k
+            moved = t_new - t
+            stats["stretched"] = int(np.count_nonzero(moved > SAME_TIME))
+            stats["max_shift"] = float(moved.max()) if len(t) else 0.0
+            t = t_new
+
+    if eps and len(t) > 1:
+        stats["close"] = int(np.count_nonzero(np.diff(t) < eps))
+    out_levels = np.empty(len(v) + 1, dtype=np.int8)
+    out_levels[0] = start
+    out_levels[1:] = v
+    return t, out_levels, stats
+
+
+def bus_bit(values, k):
+    """Nivel (int8) del bit k (LSB = 0) de cada valor de un bus uint64 (1D o (n, palabras))."""
+    if values.ndim == 2:
+        word, k = divmod(k, 64)
+        if word >= values.shape[1]:
+            return np.zeros(len(values), dtype=np.int8)
+        values = values[:, word]
+    elif k >= 64:
+        return np.zeros(len(values), dtype=np.int8)
+    return ((values >> np.uint64(k)) & np.uint64(1)).astype(np.int8)
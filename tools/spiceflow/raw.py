@@ -0,0 +1,179 @@
+"""
+raw.py
+Lector de archivos .raw (SPICE3: Xyce `.print tran format=raw`, ngspice, LTspice) sin
+cargarlos a memoria: los datos binarios se abren con np.memmap y cada nodo es una
+vista (columna) sobre ellos. También acepta raw ASCII ("Values:"), que sí se parsea.
+El número de puntos se calcula con el tamaño del archivo, así que sirve para un .raw
+que el simulador todavía está escribiendo (refresh() vuelve a mapear lo nuevo).
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.raw tt_um_mult_4.raw            # lista nodos
+  PYTHONPATH=../../tools python3 -m spiceflow.raw tt_um_mult_4.raw 'v(done)'
+"""
+import argparse
+import fnmatch
+import os
+from pathlib import Path
+
+import numpy as np
+
+MAX_HEADER = 64 * 2**20
+
+
+def _read_header(path):
+    """(líneas del encabezado, tamaño en bytes, encoding, tipo 'Binary'|'Values')."""
+    chunk = 1 << 20
+    while True:
+        with open(path, "rb") as f:
+            head = f.read(chunk)
+        # LTspice escribe el encabezado en UTF-16 LE
+        encoding = "utf-16-le" if len(head) > 1 and head[1:2] == b"\0" else "utf-8"
+        newline = "\n".encode(encoding)
+        for marker in ("Binary:", "Values:"):
+            pos = head.find(marker.encode(encoding))
+            nl = head.find(newline, pos) if pos >= 0 else -1
+            if nl >= 0:
+                size = nl + len(newline)
+                return head[:size].decode(encoding).splitlines(), size, encoding, marker[:-1]
+        if len(head) < chunk or chunk >= MAX_HEADER:
+            raise ValueError(f"{path}: encabezado raw incompleto (falta Binary:/Values:)")
+        chunk *= 4
+
+
+class RawFile:
+    """Un .raw de análisis transitorio: time + variables, como columnas."""
+    def __init__(self, path):
+        self.path = Path(path)
+        lines, self.header_size, self.encoding, self.kind = _read_header(self.path)
+        self.meta = {}
+        self.names, self.types = [], []
+        in_vars = False
+        for line in lines:
+            if line.startswith("Variables:"):
+                in_vars = True
+                continue
+            if line.startswith(("Binary:", "Values:")):
+                break
+            if in_vars:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].isdigit():
+                    self.names.append(parts[1])
+                    self.types.append(parts[2])
+                    continue
+                in_vars = False
+            if ":" in line:
+                key, val = line.split(":", 1)
+                self.meta[key.strip()] = val.strip()
+        self.flags = self.meta.get("Flags", "").lower().split()
+        if "complex" in self.flags:
+            raise ValueError(f"{path}: raw complejo (AC) no soportado")
+        self.n_vars = len(self.names)
+        self._lookup = {}
+        for i, name in enumerate(self.names):
+            self._lookup[name.lower()] = i
+            bare = name[2:-1] if name.lower().startswith(("v(", "i(")) and name.endswith(")") else name
+            self._lookup.setdefault(bare.lower(), i)
+        # LTspice: time double y el resto float (salvo flag "double"); Xyce/ngspice: todo double
+        ltspice_float = self.encoding == "utf-16-le" and "double" not in self.flags
+        if ltspice_float:
+            self.dtype = np.dtype([("t", "<f8"), ("v", "<f4", (self.n_vars - 1,))])
+        else:
+            self.dtype = np.dtype(("<f8", (self.n_vars,)))
+        self._data = None
+        self.refresh()
+
+    # ----- datos -----
+    def refresh(self):
+        """Vuelve a mapear el archivo (si creció); devuelve el número de puntos completos."""
+        if self.kind == "Values":
+            self._data = self._parse_ascii()
+            self.n_points = len(self._data)
+            return self.n_points
+        size = os.path.getsize(self.path) - self.header_size
+        n = max(0, size // self.dtype.itemsize)
+        if self._data is None or n != self.n_points:
+            self.n_points = n
+            self._data = (np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.header_size, shape=(n,))
+                          if n else np.zeros(0, dtype=self.dtype))
+        return self.n_points
+
+    def _parse_ascii(self):
+        """Cada punto es: índice, valor0 ... valorN-1 (separados por espacios/saltos)."""
+        with open(self.path, "rb") as f:
+            f.seek(self.header_size)
+            tokens = f.read().decode(self.encoding).split()
+        n = len(tokens) // (self.n_vars + 1)     # un punto a medio escribir se descarta
+        rows = np.array(tokens[:n * (self.n_vars + 1)], dtype=object).reshape(n, self.n_vars + 1)
+        return rows[:, 1:].astype(np.float64)
+
+    def index(self, name):
+        """Columna de un nodo: 'v(clk)', 'clk' o 'V(CLK)'."""
+        key = name.lower()
+        if key not in self._lookup:
+            raise KeyError(f"{name} no está en {self.path.name}")
+        return self._lookup[key]
+
+    def __contains__(self, name):
+        return name.lower() in self._lookup
+
+    def column(self, i, start=0, stop=None):
+        """Columna i (0 = tiempo) entre los puntos [start, stop), como vista si es posible."""
+        data = self._data[start:stop]
+        if self.dtype.names:
+            return data["t"] if i == 0 else data["v"][:, i - 1]
+        return data[:, i]
+
+    @property
+    def time(self):
+        return np.abs(self.column(0))   # algunos simuladores marcan puntos con tiempo negativo
+
+    def get(self, name, start=0, stop=None):
+        return self.column(self.index(name), start, stop)
+
+    def match(self, patterns):
+        """
+        Nombres de variables que cumplen algún patrón glob (sobre el nombre sin v()).
+        Un nombre exacto como 'uio_out[0]' se toma literal (en glob [0] sería una clase).
+        """
+        exact = {self._lookup[p.lower()] for p in patterns if p.lower() in self._lookup}
+        out = []
+        for i, name in enumerate(self.names[1:], 1):
+            bare = name[2:-1] if name.lower().startswith(("v(", "i(")) and name.endswith(")") else name
+            if i in exact or any(fnmatch.fnmatchcase(bare.lower(), p.lower()) or
+                                 fnmatch.fnmatchcase(name.lower(), p.lower()) for p in patterns):
+                out.append(name)
+        return out
+
+
+def write_raw(path, names, data, title="spiceflow", plotname="Transient Analysis"):
+    """
+    Escribe un .raw binario estilo Xyce (todo float64). names[0] debe ser el tiempo;
+    data: arreglo (puntos, variables). Útil para pruebas y para exportar resultados.
+    """
+    data = np.ascontiguousarray(data, dtype="<f8")
+    lines = [f"Title: {title}", "Date: -", f"Plotname: {plotname}", "Flags: real",
+             f"No. Variables: {len(names)}", f"No. Points: {len(data)}", "Variables:"]
+    for i, name in enumerate(names):
+        kind = "time" if i == 0 else ("current" if name.lower().startswith("i(") else "voltage")
+        lines.append(f"\t{i}\t{name}\t{kind}")
+    lines.append("Binary:")
+    with open(path, "wb") as f:
+        f.write(("\n".join(lines) + "\n").encode())
+        f.write(data.tobytes())
+    return path
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Lista nodos o resume señales de un .raw")
+    ap.add_argument("raw")
+    ap.add_argument("nodes", nargs="*", help="nodos o patrones glob (p.e. 'uo_out*')")
+    args = ap.parse_args()
+
+    raw = RawFile(args.raw)
+    t = raw.time
+    print(f"{raw.path.name}: {raw.n_vars} variables, {raw.n_points} puntos, "
+          f"{t[0] if len(t) else 0:.6g} .. {t[-1] if len(t) else 0:.6g} s")
+    names = raw.match(args.nodes) if args.nodes else raw.names[1:]
+    for name in names:
+        v = raw.get(name)
+        print(f" - {name:<32} min={v.min():.4g} max={v.max():.4g} final={v[-1]:.4g}")
@@ -0,0 +1,228 @@
+"""
+rawdiff.py
+Compara dos .raw (p.e. dos corners, antes/después de un cambio de layout, o Xyce contra
+el cono reducido) nodo por nodo sin cargarlos: los dos archivos se recorren a la vez en
+bloques desde el memmap, cada bloque se remuestrea a una grilla común (la unión de los
+tiempos de ambos, o uniforme con --step) y se interpola para todos los nodos a la vez.
+Por nodo: desviación máxima y su instante, primer instante en que |a - b| > tol,
+desviación media, y comparación digitalizada (histéresis 30/70 % de VDD): tiempo con
+niveles distintos, cantidad de tramos distintos y el primero. Los nodos se ordenan por
+impacto (desviación media sobre el tramo común) o por --sort.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.rawdiff tt_um_mult_4.raw ../../results/tt_um_mult_4_ss.raw
+  PYTHONPATH=../../tools python3 -m spiceflow.rawdiff a.raw b.raw --nodes 'uo_out*' --tol 0.2 --sort first
+  PYTHONPATH=../../tools python3 -m spiceflow.rawdiff a.raw b.raw --step 1e-11 --csv diff.csv --json diff.json
+"""
+import argparse
+import csv
+import json
+
+import numpy as np
+
+from .activity import HIGH, LOW, _schmitt
+from .errors import SpiceflowError
+from .raw import RawFile
+
+BLOCK_VALUES = 1 << 20      # puntos x nodos por bloque (acota la memoria)
+SORT_KEYS = {
+    "impact": lambda r: -r["mean_dev"],
+    "max": lambda r: -r["max_dev"],
+    "first": lambda r: (r["first_divergence_s"] is None, r["first_divergence_s"] or 0.0),
+    "mismatch": lambda r: -r["mismatch_s"],
+}
+
+
+class _Stream:
+    """Lectura secuencial de un .raw por bloques: tiempos y columnas elegidas."""
+    def __init__(self, raw, cols, chunk):
+        self.raw, self.cols, self.chunk = raw, cols, chunk
+        self.pos = 0
+        self.t = np.zeros(0)
+        self.v = np.zeros((0, len(cols)))
+
+    @property
+    def done(self):
+        return self.pos >= self.raw.n_points
+
+    def fill(self, n):
+        """Lee bloques hasta tener n puntos en el buffer (o llegar al final)."""
+        while len(self.t) < n and not self.done:
+            b = min(self.pos + self.chunk, self.raw.n_points)
+            t = np.abs(self.raw.column(0, self.pos, b))
+            v = np.stack([self.raw.column(c, self.pos, b) for c in self.cols], axis=1)
+            self.t = np.concatenate([self.t, t])
+            self.v = np.concatenate([self.v, v])
+            self.pos = b
+
+    def drop(self, t):
+        """Descarta los puntos anteriores al último con tiempo <= t (ese queda para interpolar)."""
+        i = max(int(np.searchsorted(self.t, t, side="right")) - 1, 0)
+        self.t, self.v = self.t[i:], self.v[i:]
+
+
+def _interp(grid, t, v):
+    """Interpolación lineal de todas las columnas de v (puntos, nodos) en grid."""
+    if len(t) == 1:
+        return np.repeat(v, len(grid), axis=0)
+    i = np.clip(np.searchsorted(t, grid, side="right") - 1, 0, len(t) - 2)
+    t0, t1 = t[i], t[i + 1]
+    span = t1 - t0
+    w = np.clip(np.divide(grid - t0, span, out=np.zeros_like(grid), where=span > 0), 0.0, 1.0)
+    return v[i] + (v[i + 1] - v[i]) * w[:, None]
+
+
+def _grid(a, b, lo, hi, first, step):
+    """Tiempos de la grilla común en (lo, hi] ([lo, hi] en el primer bloque)."""
+    if step:
+        k0 = np.ceil(lo / step) if first else np.floor(lo / step) + 1
+        return np.arange(k0, np.floor(hi / step) + 1) * step
+    keep = (lambda t: (t >= lo) & (t <= hi)) if first else (lambda t: (t > lo) & (t <= hi))
+    return np.union1d(a[keep(a)], b[keep(b)])
+
+
+def compare_raw(raw_a, raw_b, patterns=None, vdd=3.3, tol=None, step=None, chunk=None):
+    """
+    Compara los nodos comunes (que cumplen patterns) en el tramo de tiempo común.
+    Devuelve (lista de resultados por nodo, info) sin ordenar.
+    """
+    names_a = raw_a.match(patterns) if patterns else raw_a.names[1:]
+    names = [n for n in names_a if n in raw_b]
+    info = {"a": str(raw_a.path), "b": str(raw_b.path),
+            "only_a": [n for n in names_a if n not in raw_b],
+            "only_b": [n for n in (raw_b.match(patterns) if patterns else raw_b.names[1:]) if n not in raw_a]}
+    if not names:
+        raise SpiceflowError("los .raw no tienen nodos en común" + (f" que cumplan {patterns}" if patterns else ""))
+    if not raw_a.n_points or not raw_b.n_points:
+        raise SpiceflowError("uno de los .raw no tiene puntos")
+    tol = 0.05 * vdd if tol is None else tol
+    k = len(names)
+    chunk = chunk or max(1024, BLOCK_VALUES // k)
+    sa = _Stream(raw_a, [raw_a.index(n) for n in names], chunk)
+    sb = _Stream(raw_b, [raw_b.index(n) for n in names], chunk)
+    sa.fill(1)
+    sb.fill(1)
+    end = lambda r: float(abs(r.column(0, r.n_points - 1, r.n_points)[0]))
+    t_start, t_end = max(sa.t[0], sb.t[0]), min(end(raw_a), end(raw_b))
+    info.update(t_start=t_start, t_end=t_end, tol=tol, vdd=vdd, step=step)
+
+    max_dev = np.zeros(k)
+    t_max = np.full(k, t_start)
+    first_div = np.full(k, np.nan)
+    area = np.zeros(k)                  # integral de |a - b| dt
+    mism_time = np.zeros(k)
+    episodes = np.zeros(k, dtype=np.int64)
+    first_mism = np.full(k, np.nan)
+    state_a = np.full(k, -1, dtype=np.int8)
+    state_b = np.full(k, -1, dtype=np.int8)
+    prev_t, prev_d, prev_m = None, None, np.zeros(k, dtype=bool)
+    n_grid = 0
+
+    lo, first = t_start, True
+    while True:
+        sa.fill(chunk + 1)
+        sb.fill(chunk + 1)
+        hi = min(sa.t[-1], sb.t[-1], t_end)
+        grid = _grid(sa.t, sb.t, lo, hi, first, step)
+        if len(grid):
+            va, vb = _interp(grid, sa.t, sa.v), _interp(grid, sb.t, sb.v)
+            d = np.abs(va - vb)
+            n_grid += len(grid)
+
+            j = np.argmax(d, axis=0)
+            peak = d[j, np.arange(k)]
+            better = peak > max_dev
+            max_dev[better], t_max[better] = peak[better], grid[j[better]]
+
+            over = d > tol
+            hit = over.any(axis=0) & np.isnan(first_div)
+            first_div[hit] = grid[over[:, hit].argmax(axis=0)]
+
+            da = _schmitt(va, LOW * vdd, HIGH * vdd, state_a)
+            db = _schmitt(vb, LOW * vdd, HIGH * vdd, state_b)
+            state_a, state_b = da[-1], db[-1]
+            m = (da != db) & (da >= 0) & (db >= 0)
+            hit = m.any(axis=0) & np.isnan(first_mism)
+            first_mism[hit] = grid[m[:, hit].argmax(axis=0)]
+            episodes += (m & ~np.vstack([prev_m[None, :], m[:-1]])).sum(axis=0)
+
+            # trapecio para |a - b| y rectángulo izquierdo para el tiempo con niveles distintos
+            tt = grid if prev_t is None else np.concatenate([[prev_t], grid])
+            dd = d if prev_d is None else np.vstack([prev_d[None, :], d])
+            mm = m if prev_t is None else np.vstack([prev_m[None, :], m])
+            dt = np.diff(tt)[:, None]
+            area += (0.5 * (dd[1:] + dd[:-1]) * dt).sum(axis=0)
+            mism_time += (mm[:-1] * dt).sum(axis=0)
+            prev_t, prev_d, prev_m = grid[-1], d[-1], m[-1]
+        if hi >= t_end or (sa.done and sb.done and hi <= lo):
+            break
+        sa.drop(hi)
+        sb.drop(hi)
+        lo, first = hi, False
+
+    span = max(t_end - t_start, 1e-30)
+    nan_none = lambda x: None if np.isnan(x) else float(x)
+    results = [{
+        "node": name,
+        "max_dev": float(max_dev[i]),
+        "t_max_s": float(t_max[i]),
+        "mean_dev": float(area[i] / span),
+        "first_divergence_s": nan_none(first_div[i]),
+        "mismatch_s": float(mism_time[i]),
+        "mismatches": int(episodes[i]),
+        "first_mismatch_s": nan_none(first_mism[i]),
+    } for i, name in enumerate(names)]
+    info["grid_points"] = n_grid
+    return results, info
+
+
+def print_report(results, info, top=20):
+    print(f"{info['a']}  vs  {info['b']}")
+    print(f"Tramo común {info['t_start']:.6g} .. {info['t_end']:.6g} s, {info['grid_points']} puntos de grilla, "
+          f"tol = {info['tol']:.3g} V")
+    for key in ("only_a", "only_b"):
+        if info[key]:
+            print(f"  Solo en {info[key[-1]]}: {len(info[key])} nodos ({', '.join(info[key][:5])}"
+                  f"{' ...' if len(info[key]) > 5 else ''})")
+    fmt = lambda x: "-" if x is None else f"{x:.6g}"
+    print(f"\n{'node':<28} {'mean |d| V':>10} {'max |d| V':>10} {'at [s]':>12} {'first>tol':>12} "
+          f"{'digital':>8} {'time [s]':>12} {'first [s]':>12}")
+    for r in results[:top]:
+        print(f"{r['node']:<28} {r['mean_dev']:10.4g} {r['max_dev']:10.4g} {r['t_max_s']:12.6g} "
+              f"{fmt(r['first_divergence_s']):>12} {r['mismatches']:8d} {r['mismatch_s']:12.6g} "
+              f"{fmt(r['first_mismatch_s']):>12}")
+    n_div = sum(r["first_divergence_s"] is not None for r in results)
+    n_dig = sum(r["mismatches"] > 0 for r in results)
+    print(f"\n{n_div} de {len(results)} nodos superan tol; {n_dig} difieren digitalmente")
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Diferencias nodo por nodo entre dos .raw")
+    ap.add_argument("a")
+    ap.add_argument("b")
+    ap.add_argument("--nodes", nargs="+", help="nodos o patrones glob (default: todos los comunes)")
+    ap.add_argument("--vdd", type=float, default=3.3)
+    ap.add_argument("--tol", type=float, help="umbral de divergencia en V (default: 5 %% de VDD)")
+    ap.add_argument("--step", type=float, help="grilla uniforme de N s en vez de la unión de los tiempos")
+    ap.add_argument("--sort", choices=sorted(SORT_KEYS), default="impact", help="orden de los nodos")
+    ap.add_argument("--top", type=int, default=20, help="nodos a mostrar")
+    ap.add_argument("--csv", help="guardar todos los nodos en CSV")
+    ap.add_argument("--json", help="guardar resultados en JSON")
+    args = ap.parse_args()
+
+    try:
+        results, info = compare_raw(RawFile(args.a), RawFile(args.b), args.nodes, args.vdd, args.tol, args.step)
+    except SpiceflowError as e:
+        raise SystemExit(f"ERROR: {e}")
+    results.sort(key=SORT_KEYS[args.sort])
+    print_report(results, info, args.top)
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(results[0]))
+            w.writeheader()
+            w.writerows(results)
+        print(f"Wrote: {args.csv}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"info": info, "nodes": results}, f, indent=2)
+        print(f"Wrote: {args.json}")
@@ -0,0 +1,240 @@
+"""
+stim.py
+Caché binario del estímulo (.stim junto al .tim), pensado para np.memmap:
+
+  [0:8]    magic b"SPSTIM01"
+  [8:16]   uint64 LE: largo del encabezado JSON
+  [16:..]  encabezado JSON (utf-8), relleno con espacios hasta múltiplo de 8
+  [...]    arreglos de datos alineados a 8 bytes, little-endian
+
+El encabezado guarda time_scale, el mapeo del diseño, la identidad del .tim de origen
+(tamaño y mtime) y un índice nombre -> {kind, width, count, times_offset, values_offset,
+values_dtype, values_shape}. times son float64 ordenados en unidades de time_scale;
+values tiene count + 1 elementos (el primero es el Start_State), int8 para señales y
+uint64 para buses (n, palabras si el ancho pasa de 64 bits).
+Abrir una señal es O(1) (una vista del memmap) y el valor en un instante se obtiene
+por búsqueda binaria.
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.stim tt_um_femto.tim              # lista señales
+  PYTHONPATH=../../tools python3 -m spiceflow.stim tt_um_femto.tim clk --at 1e-6
+  PYTHONPATH=../../tools python3 -m spiceflow.stim tt_um_femto.tim --check     # value_at en cada flanco
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .pwl import bus_bit
+from .tim import load_tim
+
+MAGIC = b"SPSTIM01"
+STIM_SUFFIX = ".stim"
+ALIGN = 8
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def stim_path_for(tim_path):
+    """tt_um_femto.tim -> tt_um_femto.tim.stim"""
+    tim_path = Path(tim_path)
+    return tim_path.with_name(tim_path.name + STIM_SUFFIX)
+
+
+def source_id(tim_path):
+    st = os.stat(tim_path)
+    return {"name": Path(tim_path).name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# ---------- ESCRITURA ----------
+def write_stim(path, time_scale, traces, mapping=None, source=None):
+    """Escribe traces (forma de tim.tim_traces) al archivo binario."""
+    index, blobs, offset = {}, [], 0
+    for name, tr in traces.items():
+        times = np.ascontiguousarray(tr['times'], dtype="<f8")
+        values = np.ascontiguousarray(tr['values'], dtype="<u8" if tr['kind'] == 'bus' else "i1")
+        entry = {"kind": tr['kind'], "width": int(tr['width']), "count": int(len(times)),
+                 "times_offset": offset, "values_offset": _align(offset + times.nbytes),
+                 "values_dtype": values.dtype.str, "values_shape": list(values.shape)}
+        offset = _align(entry["values_offset"] + values.nbytes)
+        index[name] = entry
+        blobs.append((entry["times_offset"], times))
+        blobs.append((entry["values_offset"], values))
+
+    header = json.dumps({"version": 1, "time_scale": time_scale, "mapping": mapping,
+                         "source": source, "signals": index}).encode()
+    header += b" " * (_align(len(header)) - len(header))
+    data_start = len(MAGIC) + 8 + len(header)
+
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for off, arr in blobs:
+            pad = data_start + off - f.tell()
+            if pad:
+                f.write(b"\0" * pad)
+            f.write(arr.tobytes())
+    os.replace(tmp, path)       # quien tenga el archivo abierto sigue viendo la versión previa
+    return path
+
+
+# ---------- LECTURA ----------
+class StimSignal:
+    """Una señal/bus del caché: vistas sobre el memmap (no copia datos)."""
+    def __init__(self, name, entry, buf, time_scale):
+        self.name = name
+        self.kind = entry["kind"]
+        self.width = entry["width"]
+        self.time_scale = time_scale
+        n = entry["count"]
+        self.times = np.frombuffer(buf, dtype="<f8", count=n, offset=entry["times_offset"])
+        shape = tuple(entry["values_shape"])
+        self.values = np.frombuffer(buf, dtype=entry["values_dtype"], count=int(np.prod(shape)),
+                                    offset=entry["values_offset"]).reshape(shape)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def times_s(self):
+        return self.times * self.time_scale
+
+    def index_at(self, t_s):
+        """Índice en values vigente en t_s [s] (escalar o arreglo); un flanco en t ya cuenta en t."""
+        # t_s / time_scale puede quedar un ulp por debajo del tick del flanco (1.5e-8 / 1e-12 =
+        # 14999.999...): se redondea al tick entero si está a ese nivel de distancia
+        ticks = np.asarray(t_s, dtype=np.float64) / self.time_scale
+        near = np.rint(ticks)
+        ticks = np.where(np.isclose(ticks, near, rtol=1e-9, atol=1e-9), near, ticks)
+        return np.searchsorted(self.times, ticks, side="right")
+
+    def value_at(self, t_s):
+        """Nivel (señal) o valor (bus) en t_s [s]; arreglo si t_s es arreglo."""
+        return self.values[self.index_at(t_s)]
+
+    def bit(self, k):
+        """Niveles (inicio + flancos) del bit k de un bus."""
+        return self.values if self.kind == "signal" else bus_bit(self.values, k)
+
+    def trace(self):
+        """Traza en la forma de tim.tim_traces (para el conversor)."""
+        return {'kind': self.kind, 'width': self.width, 'times': self.times, 'values': self.values}
+
+
+class StimFile:
+    """Caché .stim abierto con memmap; el encabezado se lee una vez."""
+    def __init__(self, path):
+        self.path = Path(path)
+        self._buf = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if bytes(self._buf[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path}: no es un archivo .stim")
+        hlen = int(np.frombuffer(self._buf, dtype="<u8", count=1, offset=len(MAGIC))[0])
+        start = len(MAGIC) + 8
+        header = json.loads(bytes(self._buf[start:start + hlen]))
+        self._data = self._buf[start + hlen:]
+        self.time_scale = header["time_scale"]
+        self.mapping = header["mapping"]
+        self.source = header["source"]
+        self.index = header["signals"]
+        self._open = {}
+
+    def names(self):
+        return list(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def signal(self, name):
+        if name not in self._open:
+            self._open[name] = StimSignal(name, self.index[name], self._data, self.time_scale)
+        return self._open[name]
+
+    def value_at(self, name, t_s):
+        return self.signal(name).value_at(t_s)
+
+    def traces(self):
+        return {name: self.signal(name).trace() for name in self.index}
+
+    def check(self):
+        """Señales en las que value_at(times_s[i]) no da values[i + 1]: {nombre: fallos}."""
+        bad = {}
+        for name in self.index:
+            sig = self.signal(name)
+            if not len(sig):
+                continue
+            last = np.r_[sig.times[1:] != sig.times[:-1], True]     # flancos en el mismo instante: vale el último
+            got, want = sig.value_at(sig.times_s[last]), sig.values[1:][last]
+            n = int(np.count_nonzero((got != want).reshape(len(got), -1).any(axis=1)))
+            if n:
+                bad[name] = n
+        return bad
+
+    def is_fresh(self, tim_path):
+        """True si el caché corresponde al .tim actual (tamaño y mtime)."""
+        return self.source == source_id(tim_path)
+
+
+def load_stimulus(tim_path, mapping=None, refresh=False):
+    """
+    Abre el .stim junto al .tim; si no existe, está viejo o refresh=True, parsea el .tim
+    y lo regenera. Si solo cambió el mapeo se reescribe desde el caché (sin parsear).
+    """
+    tim_path = Path(tim_path)
+    path = stim_path_for(tim_path)
+    stim = None
+    if path.exists() and not refresh:
+        try:
+            stim = StimFile(path)
+        except (ValueError, KeyError, json.JSONDecodeError):
+            stim = None
+        if stim is not None and not stim.is_fresh(tim_path):
+            stim = None
+    if stim is not None:
+        if mapping is None or stim.mapping == mapping:
+            return stim
+        write_stim(path, stim.time_scale, stim.traces(), mapping, stim.source)
+        return StimFile(path)
+
+    time_scale, traces = load_tim(tim_path)
+    write_stim(path, time_scale, traces, mapping, source_id(tim_path))
+    return StimFile(path)
+
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Consulta el caché binario de estímulos (.tim.stim)")
+    ap.add_argument("tim", help="archivo .tim (o .stim)")
+    ap.add_argument("signal", nargs="?", help="señal/bus a consultar")
+    ap.add_argument("--at", type=float, action="append", help="instante [s] (repetible)")
+    ap.add_argument("--refresh", action="store_true", help="regenerar el caché")
+    ap.add_argument("--check", action="store_true", help="verificar value_at en cada flanco de cada señal")
+    args = ap.parse_args()
+
+    if args.tim.endswith(STIM_SUFFIX):
+        stim = StimFile(args.tim)
+    else:
+        stim = load_stimulus(args.tim, refresh=args.refresh)
+    if args.check:
+        bad = stim.check()
+        for name, n in bad.items():
+            print(f" - {name}: {n} flancos con value_at(t) distinto del valor del flanco")
+        if bad:
+            raise SystemExit(f"ERROR: {stim.path}: {len(bad)} señales fallan la verificación")
+        print(f"{stim.path}: {len(stim.names())} señales OK")
+    elif not args.signal:
+        print(f"{stim.path}  time_scale={stim.time_scale}")
+        for name in stim.names():
+            e = stim.index[name]
+            print(f" - {name:<24} {e['kind']:<6} width={e['width']:<3} edges={e['count']}")
+    else:
+        sig = stim.signal(args.signal)
+        for t in args.at or [float(sig.times_s[-1]) if len(sig) else 0.0]:
+            v = sig.value_at(t)
+            if sig.kind == "bus":
+                v = format(sum(int(w) << (64 * i) for i, w in enumerate(np.atleast_1d(v))), "X")
+            print(f"{args.signal} @ {t:.6g} s = {v}")
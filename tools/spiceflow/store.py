@@ -0,0 +1,373 @@
+"""
+store.py
+Archivo de resultados de varias corridas post-layout (diseño, esquina, VDD, estímulo),
+para conservar los .raw que `make clean` borra y compararlos sin volver a simular.
+
+  <store>/manifest.json          corridas: diseño, esquina, VDD, hash del .tim, origen...
+  <store>/runs/<run>/data.bin    bloques comprimidos (zlib), uno por señal y tramo de tiempo
+  <store>/runs/<run>/index.npz   por tramo: t0, t1, puntos; por (tramo, señal): offset, largo
+  <store>/runs/<run>/run.json    nombres de las señales y parámetros de compresión
+
+Cada tramo tiene CHUNK_POINTS puntos. El tiempo se guarda como delta entero de sus bits
+(float64 positivos y crecientes tienen bits crecientes: sin pérdida); antes de zlib los
+bytes de cada arreglo se reordenan por plano (shuffle), que para formas de onda
+digitales comprime muchísimo mejor. Leer una señal en [t0, t1] solo descomprime los
+tramos que la cubren (búsqueda binaria sobre t0/t1 de los tramos).
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow.store --store ../../results ingest tt_um_mult_4.raw
+  PYTHONPATH=../../tools python3 -m spiceflow.store --store ../../results list
+  PYTHONPATH=../../tools python3 -m spiceflow.store --store ../../results get 'uo_out[0]' --t0 1e-6 --t1 2e-6 \\
+      --where design=mult_4
+  PYTHONPATH=../../tools python3 -m spiceflow.store --store ../../results export <run> copia.raw
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .errors import SpiceflowError
+from .raw import RawFile, write_raw
+
+MANIFEST = "manifest.json"
+CHUNK_POINTS = 1 << 16
+ZLIB_LEVEL = 6
+WORKERS = os.cpu_count() or 1
+
+
+# ---------- CODIFICACIÓN ----------
+def _encode(arr, level=ZLIB_LEVEL):
+    """shuffle de bytes + zlib."""
+    a = np.ascontiguousarray(arr)
+    planes = a.view(np.uint8).reshape(-1, a.dtype.itemsize).T
+    return zlib.compress(planes.tobytes(), level)
+
+
+def _decode(blob, dtype, n):
+    dtype = np.dtype(dtype)
+    planes = np.frombuffer(zlib.decompress(blob), dtype=np.uint8).reshape(dtype.itemsize, n)
+    return planes.T.copy().view(dtype).ravel()
+
+
+def _key(name):
+    """'V(UO_OUT[0])' -> 'uo_out[0]' (como RawFile.index)."""
+    n = name.lower()
+    return n[2:-1] if n.startswith(("v(", "i(")) and n.endswith(")") else n
+
+
+def file_sha256(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cir_info(cir_path):
+    """(esquina, vdd) leídos del .cir generado por el conversor, o (None, None)."""
+    corner = vdd = None
+    try:
+        for line in open(cir_path):
+            if line.startswith("* VDD Level:"):
+                vdd = float(line.split(":")[1].split()[0])
+            elif line.lower().startswith(".lib"):
+                parts = line.split()
+                corner = parts[2] if len(parts) > 2 else None
+            elif line.lower().startswith(".tran"):
+                break
+    except (OSError, ValueError):
+        pass
+    return corner, vdd
+
+
+# ---------- ESCRITURA ----------
+class AlreadyArchived(SpiceflowError):
+    """El .raw (mismo nombre, tamaño y mtime) ya está archivado; .run es esa corrida."""
+    def __init__(self, raw_name, run):
+        super().__init__(f"{raw_name} ya está archivado como {run} (use --force)")
+        self.run = run
+
+
+class Store:
+    def __init__(self, root):
+        self.root = Path(root)
+        self.manifest_path = self.root / MANIFEST
+        self.runs = {}
+        if self.manifest_path.exists():
+            self.runs = json.loads(self.manifest_path.read_text())["runs"]
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": 1, "runs": self.runs}, indent=2))
+        os.replace(tmp, self.manifest_path)
+
+    def run_dir(self, run):
+        return self.root / "runs" / run
+
+    def find_source(self, source):
+        """Corrida ya archivada a partir del mismo .raw (nombre, tamaño y mtime), o None."""
+        for run, info in self.runs.items():
+            if info.get("source") == source:
+                return run
+        return None
+
+    def ingest(self, raw_path, run=None, design=None, corner=None, vdd=None, tim=None,
+               patterns=None, float32=False, note="", chunk_points=CHUNK_POINTS, force=False):
+        """
+        Archiva un .raw; devuelve el nombre de la corrida. Si ese .raw ya está archivado
+        levanta AlreadyArchived (salvo force). El nombre por defecto termina en un hash
+        corto del origen, así dos .raw del mismo diseño/esquina/VDD en el mismo segundo
+        no chocan.
+        """
+        raw_path = Path(raw_path)
+        st = os.stat(raw_path)
+        source = {"name": raw_path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        old = self.find_source(source)
+        if old and not force:
+            raise AlreadyArchived(raw_path.name, old)
+
+        raw = RawFile(raw_path)
+        cir_corner, cir_vdd = cir_info(raw_path.with_suffix(".cir"))
+        design = design or re.sub(r'^tt_um_', '', raw_path.stem)
+        corner = corner or cir_corner
+        vdd = vdd if vdd is not None else cir_vdd
+        tim = Path(tim) if tim else raw_path.with_suffix(".tim")
+        stim_hash = file_sha256(tim) if tim.exists() else None
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        tag = hashlib.sha256(json.dumps(source, sort_keys=True).encode()).hexdigest()[:6]
+        run = run or f"{design}_{corner or 'na'}_{vdd or 'na'}V_{stamp}_{tag}"
+        if run in self.runs and not force:
+            raise SpiceflowError(f"la corrida {run} ya existe (use --force)")
+
+        names = raw.match(patterns) if patterns else raw.names[1:]
+        cols = [raw.index(n) for n in names]
+        dtype = np.dtype("<f4" if float32 else "<f8")
+        n = raw.n_points
+        n_chunks = (n + chunk_points - 1) // chunk_points
+        t0 = np.zeros(n_chunks)
+        t1 = np.zeros(n_chunks)
+        count = np.zeros(n_chunks, dtype=np.int64)
+        offsets = np.zeros((n_chunks, len(cols) + 1), dtype=np.int64)
+        lengths = np.zeros((n_chunks, len(cols) + 1), dtype=np.int64)
+
+        out = self.run_dir(run)
+        if out.exists():
+            shutil.rmtree(out)
+        out.mkdir(parents=True)
+        pos = 0
+        with open(out / "data.bin", "wb") as f, ThreadPoolExecutor(WORKERS) as pool:
+            for c in range(n_chunks):
+                a, b = c * chunk_points, min((c + 1) * chunk_points, n)
+                t = np.abs(raw.column(0, a, b)).astype("<f8")
+                t0[c], t1[c], count[c] = t[0], t[-1], b - a
+                base = np.array([0.0 if c == 0 else t1[c - 1]]).view("<u8")
+                dt = np.diff(t.view("<u8"), prepend=base)
+                arrays = [dt] + [raw.column(i, a, b).astype(dtype) for i in cols]
+                for j, blob in enumerate(pool.map(_encode, arrays)):     # zlib suelta el GIL
+                    offsets[c, j], lengths[c, j] = pos, len(blob)
+                    f.write(blob)
+                    pos += len(blob)
+        np.savez(out / "index.npz", t0=t0, t1=t1, count=count, offsets=offsets, lengths=lengths)
+        (out / "run.json").write_text(json.dumps({"names": names, "dtype": dtype.str,
+                                                  "chunk_points": chunk_points}, indent=1))
+
+        raw_bytes = n * raw.dtype.itemsize * (len(cols) + 1) // raw.n_vars
+        self.runs[run] = {
+            "design": design, "corner": corner, "vdd": vdd,
+            "stimulus": tim.name if stim_hash else None, "stimulus_sha256": stim_hash,
+            "source": source, "created": stamp, "note": note,
+            "points": int(n), "t_start": float(t0[0]) if n else 0.0, "t_stop": float(t1[-1]) if n else 0.0,
+            "signals": len(names), "dtype": dtype.str,
+            "bytes": int(pos), "ratio": round(raw_bytes / max(pos, 1), 2),
+        }
+        self._save_manifest()
+        return run
+
+    def remove(self, run):
+        shutil.rmtree(self.run_dir(run), ignore_errors=True)
+        self.runs.pop(run, None)
+        self._save_manifest()
+
+    # ----- lectura -----
+    def select(self, where=None):
+        """Corridas cuyo manifiesto cumple where {'design': 'mult_4', 'vdd': '1.8', ...}."""
+        out = []
+        for run, info in self.runs.items():
+            if all(str(info.get(k)) == str(v) for k, v in (where or {}).items()):
+                out.append(run)
+        return out
+
+    def open(self, run):
+        return StoredRun(self.run_dir(run), run, self.runs[run])
+
+    def query(self, signal, t0=None, t1=None, where=None, runs=None):
+        """{corrida: (t, v)} de una señal en [t0, t1] para cada corrida seleccionada."""
+        out = {}
+        for run in runs or self.select(where):
+            r = self.open(run)
+            if signal in r:
+                out[run] = r.get(signal, t0, t1)
+        return out
+
+
+class StoredRun:
+    def __init__(self, path, run, info):
+        self.path = Path(path)
+        self.run = run
+        self.info = info
+        meta = json.loads((self.path / "run.json").read_text())
+        self.names = meta["names"]
+        self.dtype = np.dtype(meta["dtype"])
+        self._lookup = {}
+        for j, name in enumerate(self.names):
+            self._lookup.setdefault(name.lower(), j)
+            self._lookup.setdefault(_key(name), j)
+        with np.load(self.path / "index.npz") as z:
+            self.t0, self.t1, self.count = z["t0"], z["t1"], z["count"]
+            self.offsets, self.lengths = z["offsets"], z["lengths"]
+        self._times = {}
+
+    def __contains__(self, name):
+        return name.lower() in self._lookup
+
+    def _blob(self, f, c, j):
+        f.seek(int(self.offsets[c, j]))
+        return f.read(int(self.lengths[c, j]))
+
+    def _chunk_times(self, f, c):
+        if c not in self._times:
+            dt = _decode(self._blob(f, c, 0), "<u8", int(self.count[c]))
+            base = np.array([0.0 if c == 0 else self.t1[c - 1]]).view("<u8")
+            self._times[c] = (base + np.cumsum(dt, dtype=np.uint64)).view("<f8")
+        return self._times[c]
+
+    def chunks(self, t0=None, t1=None):
+        lo = 0 if t0 is None else int(np.searchsorted(self.t1, t0, side="left"))
+        hi = len(self.t0) if t1 is None else int(np.searchsorted(self.t0, t1, side="right"))
+        return range(lo, hi)
+
+    def get(self, name, t0=None, t1=None):
+        """(t, v) de una señal; solo se leen los tramos que cubren [t0, t1]."""
+        j = self._lookup[name.lower()] + 1
+        ts, vs = [], []
+        with open(self.path / "data.bin", "rb") as f:
+            for c in self.chunks(t0, t1):
+                ts.append(self._chunk_times(f, c))
+                vs.append(_decode(self._blob(f, c, j), self.dtype, int(self.count[c])))
+        if not ts:
+            return np.zeros(0), np.zeros(0, dtype=self.dtype)
+        t, v = np.concatenate(ts), np.concatenate(vs)
+        m = np.ones(len(t), dtype=bool)
+        if t0 is not None:
+            m &= t >= t0
+        if t1 is not None:
+            m &= t <= t1
+        return t[m], v[m]
+
+    def export_raw(self, path):
+        """Reconstruye un .raw binario (para plot_*.py y demás herramientas)."""
+        t = self.get(self.names[0])[0] if self.names else np.zeros(0)
+        cols = [self.get(n)[1].astype("<f8") for n in self.names]
+        write_raw(path, ["time"] + self.names, np.column_stack([t] + cols),
+                  title=f"spiceflow store: {self.run}")
+        return path
+
+
+# ---------- CLI ----------
+def _where(items):
+    out = {}
+    for item in items or []:
+        k, _, v = item.partition("=")
+        out[k] = v
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Archivo comprimido de resultados de varias corridas")
+    ap.add_argument("--store", default="results", help="directorio del archivo (default: ./results)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("ingest", help="archivar un .raw")
+    p.add_argument("raw")
+    p.add_argument("--run", help="nombre de la corrida (default: diseño_esquina_VDD_fecha_hash)")
+    p.add_argument("--design")
+    p.add_argument("--corner", help="default: la esquina del .lib del .cir")
+    p.add_argument("--vdd", type=float, help="default: el VDD del .cir")
+    p.add_argument("--tim", help="estímulo para el hash (default: <raw>.tim)")
+    p.add_argument("--nodes", nargs="+", help="solo estos nodos/patrones (default: todos)")
+    p.add_argument("--float32", action="store_true", help="guardar en float32 (la mitad, con pérdida)")
+    p.add_argument("--note", default="")
+    p.add_argument("--force", action="store_true")
+
+    p = sub.add_parser("list", help="listar corridas")
+    p.add_argument("--where", nargs="+", help="filtros campo=valor")
+
+    p = sub.add_parser("get", help="una señal en un rango de tiempo, en todas las corridas")
+    p.add_argument("signal")
+    p.add_argument("--t0", type=float)
+    p.add_argument("--t1", type=float)
+    p.add_argument("--where", nargs="+", help="filtros campo=valor")
+    p.add_argument("--plot", help="guardar una gráfica comparativa (png/svg)")
+
+    p = sub.add_parser("export", help="reconstruir el .raw de una corrida")
+    p.add_argument("run")
+    p.add_argument("out")
+
+    p = sub.add_parser("rm", help="borrar una corrida")
+    p.add_argument("run")
+    args = ap.parse_args()
+
+    store = Store(args.store)
+    if args.cmd == "ingest":
+        try:
+            run = store.ingest(args.raw, args.run, args.design, args.corner, args.vdd, args.tim,
+                               args.nodes, args.float32, args.note, force=args.force)
+        except AlreadyArchived as e:    # no es un error: `make archive` dos veces no hace nada
+            print(e)
+            sys.exit(0)
+        except SpiceflowError as e:
+            raise SystemExit(f"ERROR: {e}")
+        info = store.runs[run]
+        print(f"Wrote: {store.run_dir(run)}  ({info['signals']} señales, {info['points']} puntos, "
+              f"{info['bytes'] / 2**20:.1f} MiB, {info['ratio']}x)")
+    elif args.cmd == "list":
+        print(f"{'run':<40} {'design':<10} {'corner':<7} {'vdd':>5} {'points':>10} {'MiB':>8} {'ratio':>6}  stimulus")
+        for run in store.select(_where(args.where)):
+            i = store.runs[run]
+            print(f"{run:<40} {i['design']:<10} {str(i['corner']):<7} {str(i['vdd']):>5} {i['points']:10d} "
+                  f"{i['bytes'] / 2**20:8.2f} {i['ratio']:6} {(i['stimulus_sha256'] or '-')[:12]}")
+    elif args.cmd == "get":
+        res = store.query(args.signal, args.t0, args.t1, _where(args.where))
+        for run, (t, v) in res.items():
+            if len(t):
+                print(f"{run:<40} {len(t):8d} puntos  {t[0]:.6g} .. {t[-1]:.6g} s  "
+                      f"min={v.min():.4g} max={v.max():.4g} final={v[-1]:.4g}")
+            else:
+                print(f"{run:<40} sin puntos en el rango")
+        if args.plot and res:
+            import matplotlib
+            matplotlib.use("Agg")
+            import matplotlib.pyplot as plt
+            plt.figure(figsize=(14, 6))
+            for run, (t, v) in res.items():
+                plt.plot(t, v, linewidth=1.2, label=run)
+            plt.xlabel('Time (s)', fontsize=11)
+            plt.ylabel(args.signal, fontsize=11)
+            plt.grid(True, which='both', linestyle='--', linewidth=0.4, alpha=0.5)
+            plt.legend(fontsize=8)
+            plt.tight_layout()
+            plt.savefig(args.plot)
+            print(f"Wrote: {args.plot}")
+    elif args.cmd == "export":
+        print(f"Wrote: {store.open(args.run).export_raw(args.out)}")
+    elif args.cmd == "rm":
+        store.remove(args.run)
@@ -0,0 +1,148 @@
+"""
+tim.py
+Lector de .tim (GTKWave Timing Analyzer) línea por línea.
+Los flancos quedan en arreglos numpy, en unidades de Time_Scale y en el orden del archivo:
+  signals[name] = {'start': '0'|'1'|'X', 'times': float64[], 'values': int8[]}
+  buses[name]   = {'start': 'hex', 'times': float64[], 'values': [hex, ...], 'digits': n}
+Los flancos con valor X/Z se descartan, igual que en los scripts originales.
+"""
+import re
+from array import array
+from collections import OrderedDict
+
+import numpy as np
+
+from .mapping import bus_range
+
+DEFAULT_TIME_SCALE = 1e-12
+HEX_DIGITS = set("0123456789abcdefABCDEF")
+
+
+def _new_block(kind):
+    if kind == "Digital_Signal":
+        return {'start': '0', 'times': array('d'), 'values': array('b')}
+    return {'start': '0', 'times': array('d'), 'values': [], 'digits': 1}
+
+
+def parse_tim(path):
+    """Devuelve (time_scale, signals, buses) leyendo el archivo en streaming."""
+    time_scale = None
+    signals, buses = OrderedDict(), OrderedDict()
+    kind = name = block = None
+
+    def close():
+        if block is None or name is None:
+            return
+        block['times'] = np.frombuffer(block['times'], dtype=np.float64) if block['times'] else np.zeros(0)
+        if kind == "Digital_Signal":
+            block['values'] = np.frombuffer(block['values'], dtype=np.int8) if block['values'] \
+                else np.zeros(0, dtype=np.int8)
+            signals[name] = block
+        else:
+            buses[name] = block
+
+    with open(path) as f:
+        for line in f:
+            s = line.strip()
+            if not s:
+                continue
+            if s.startswith("Edge:"):
+                if block is None:
+                    continue
+                parts = s.split()
+                if len(parts) < 3:
+                    continue
+                try:
+                    t = float(parts[1])
+                except ValueError:
+                    continue
+                v = parts[2]
+                if kind == "Digital_Signal":
+                    if v[0] in "01":
+                        block['times'].append(t)
+                        block['values'].append(int(v[0]))
+                else:
+                    v = v.upper()
+                    if all(c in HEX_DIGITS for c in v):
+                        block['times'].append(t)
+                        block['values'].append(v)
+                        if len(v) > block['digits']:
+                            block['digits'] = len(v)
+            elif s.startswith("Digital_Signal") or s.startswith("Digital_Bus"):
+                close()
+                kind = "Digital_Signal" if s.startswith("Digital_Signal") else "Digital_Bus"
+                block, name = _new_block(kind), None
+            elif s.startswith("Name:") and block is not None:
+                name = s[5:].strip()
+            elif s.startswith("Start_State:") and block is not None:
+                start = s[12:].strip().upper()
+                if kind == "Digital_Signal":
+                    block['start'] = start[:1] or '0'
+                else:
+                    m = re.match(r'[0-9A-F]+', start)
+                    block['start'] = m.group(0) if m else '0'
+                    block['digits'] = max(block['digits'], len(block['start']))
+            elif s.startswith("Time_Scale:") and time_scale is None:
+                try:
+                    time_scale = float(s[11:].split()[0])
+                except (ValueError, IndexError):
+                    pass
+            elif s[0].isalpha() and ":" not in s:
+                # otro tipo de bloque (p.e. analógico): se ignora hasta el siguiente
+                close()
+                kind = name = block = None
+        close()
+
+    return time_scale or DEFAULT_TIME_SCALE, signals, buses
+
+
+def _hex_words(hexes, width):
+    """Valores hex -> uint64 (1D si width <= 64, si no (n, palabras) LSW primero)."""
+    nwords = max(1, (width + 63) // 64)
+    if nwords == 1:
+        mask = (1 << width) - 1 if width < 64 else (1 << 64) - 1
+        return np.fromiter((int(h, 16) & mask for h in hexes), dtype=np.uint64, count=len(hexes))
+    out = np.empty((len(hexes), nwords), dtype=np.uint64)
+    for i, h in enumerate(hexes):
+        v = int(h, 16)
+        for w in range(nwords):
+            out[i, w] = (v >> (64 * w)) & 0xFFFFFFFFFFFFFFFF
+    return out
+
+
+def tim_traces(signals, buses):
+    """
+    Forma normalizada que usan el conversor y el caché binario (stim.py):
+      traces[name] = {'kind': 'signal'|'bus', 'width': n,
+                      'times': float64[] ordenados (unidades de Time_Scale),
+                      'values': nivel/valor inicial seguido del valor tras cada flanco}
+    Señales: values int8 (0/1, Start_State X -> 0). Buses: values uint64 (o (n, palabras)).
+    """
+    traces = OrderedDict()
+    for name, info in signals.items():
+        times, values = info['times'], info['values']
+        if len(times) > 1 and not np.all(times[1:] >= times[:-1]):
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+        traces[name] = {
+            'kind': 'signal', 'width': 1, 'times': times,
+            'values': np.concatenate(([1 if info['start'] == '1' else 0], values)).astype(np.int8),
+        }
+    for name, info in buses.items():
+        _, hi, lo = bus_range(name)
+        width = abs(hi - lo) + 1 if hi is not None else max(1, info['digits'] * 4)
+        times, hexes = info['times'], info['values']
+        if len(times) > 1 and not np.all(times[1:] >= times[:-1]):
+            order = np.argsort(times, kind="stable")
+            times, hexes = times[order], [hexes[i] for i in order]
+        traces[name] = {
+            'kind': 'bus', 'width': width, 'times': times,
+            'values': _hex_words([info['start'] or "0"] + list(hexes), width),
+        }
+    return traces
+
+
+def load_tim(path):
+    """parse_tim + tim_traces: (time_scale, traces)."""
+    time_scale, signals, buses = parse_tim(path)
+    return time_scale, tim_traces(signals, buses)
@@ -0,0 +1,175 @@
+"""
+tim2cir.py
+Convierte un .tim (GTKWave) a .cir (Xyce/ngspice) con fuentes PWL tipo square, según
+el mapeo del diseño (tim_map.json / tim_map.yaml, ver mapping.py).
+Uso:
+  PYTHONPATH=../../tools python3 -m spiceflow tt_um_femto.tim [tt_um_femto.cir]
+  PYTHONPATH=../../tools python3 -m spiceflow tt_um_mult_4.tim --map tim_map.json --profile
+  PYTHONPATH=../../tools python3 -m spiceflow tt_um_mult_4.tim --probe-current
+  PYTHONPATH=../../tools python3 -m spiceflow tt_um_femto.tim --min-pulse 50e-12 --pulse-mode drop
+Sin --map se busca tim_map.{json,yaml,yml} junto al .tim y en el directorio actual.
+El .tim parseado queda en caché junto a él (<tim>.stim, ver stim.py); mientras el .tim
+no cambie las siguientes conversiones no lo vuelven a parsear (--no-cache para evitarlo).
+"""
+import argparse
+from collections import OrderedDict
+from pathlib import Path
+
+from .errors import SpiceflowError
+from .mapping import bus_bit_nodes, find_mapping, load_mapping, signal_node, source_name
+from .profile import StageProfiler, stage
+from .pwl import PULSE_MODES, bus_bit, epsilon_for, filter_pulses, pwl_points
+from .stim import load_stimulus
+from .tim import load_tim
+
+DEFAULT_OUT_SUFFIX = ".cir"
+WRITE_CHUNK = 8192        # puntos PWL por f.write()
+
+
+# ---------- TRAZAS ----------
+def build_traces(time_scale, tim_traces, cfg, profiler=None, changes=None):
+    """
+    tim_traces: forma normalizada (tim.tim_traces o StimFile.traces()).
+    Devuelve OrderedDict (fuente, nodo) -> (t[s], nivel 0/1): primero las señales, luego
+    los bits de los buses cuyo nodo no esté ya manejado por una señal.
+    Los pulsos más cortos que cfg["min_pulse"] (default: epsilon) se filtran según
+    cfg["pulse_mode"]; si changes es un dict, recibe nodo -> stats de los nodos modificados.
+    """
+    eps = epsilon_for(time_scale)
+    min_pulse = eps if cfg["min_pulse"] is None else cfg["min_pulse"]
+    traces = OrderedDict()
+    driven = set()
+
+    def points(node, times, levels):
+        t, lv, stats = filter_pulses(times, levels, min_pulse, cfg["pulse_mode"], eps)
+        if changes is not None and (stats["dropped"] or stats["stretched"] or stats["close"]):
+            changes[node] = stats
+        return pwl_points(t, lv, eps)
+
+    for name, tr in tim_traces.items():
+        if tr['kind'] != 'signal':
+            continue
+        node = signal_node(name, cfg)
+        if node is None:
+            continue
+        with stage(profiler, "pwl"):
+            traces[(source_name(node), node)] = points(node, tr['times'] * time_scale, tr['values'])
+        driven.add(node)
+
+    for bus_name, tr in tim_traces.items():
+        if tr['kind'] != 'bus':
+            continue
+        with stage(profiler, "buses"):
+            digits = (tr['width'] + 3) // 4
+            bits = [(k, node) for k, node in bus_bit_nodes(bus_name, digits, cfg) if node not in driven]
+            times = tr['times'] * time_scale
+            levels = [bus_bit(tr['values'], k) for k, _ in bits]
+        for (k, node), lv in zip(bits, levels):
+            with stage(profiler, "pwl"):
+                traces[(source_name(node), node)] = points(node, times, lv)
+    return traces
+
+
+# ---------- ESCRITURA ----------
+def write_cir(out_path, tim_path, traces, time_scale, cfg):
+    """Escribe el .cir; cada fuente PWL va en una línea, en bloques de WRITE_CHUNK puntos."""
+    vdd = cfg["vdd"]
+    levels = (format(0.0, '.6g'), format(float(vdd), '.6g'))
+    max_t = max((float(t[-1]) for t, _ in traces.values() if len(t)), default=0.0)
+    sim_time = max(1e-9, max_t * 1.1)
+    timestep = max(time_scale * 10.0, 1e-12)
+
+    with open(out_path, "w") as f:
+        f.write(f"* Generated from {tim_path.name}\n")
+        f.write(f"* VDD Level: {vdd} V\n\n")
+        f.write(f".lib {cfg['lib']}\n\n")
+        f.write(f".tran {format(timestep, '.12g')} {format(sim_time, '.12g')}\n")
+        probes = " i(Vvdd)" if cfg["probe_current"] else ""
+        f.write(f".print tran format=raw file={out_path.with_suffix('').name}.raw v(*){probes}\n\n")
+        f.write("* Power rails\n")
+        f.write(f"Vvdd VPWR 0 DC {vdd}\n")
+        f.write("Vgnd VGND 0 DC 0\n\n")
+        for (vname, node), (t, v) in traces.items():
+            f.write(f"* {node}\n")
+            f.write(f"{vname} {node} 0 PWL(")
+            ts, vs = t.tolist(), v.tolist()
+            for i in range(0, len(ts), WRITE_CHUNK):
+                if i:
+                    f.write(" ")
+                f.write(" ".join(["%.12g %s" % (ti, levels[vi])
+                                  for ti, vi in zip(ts[i:i + WRITE_CHUNK], vs[i:i + WRITE_CHUNK])]))
+            f.write(")\n\n")
+        f.write(f".include \"./{tim_path.with_suffix('.spice').name}\"\n")
+        f.write(".end\n")
+    return sim_time, timestep
+
+
+# ---------- MAIN ----------
+def convert_tim_to_cir(tim_path, out_path=None, mapping=None, profiler=None, cache=True):
+    """
+    mapping: dict de load_mapping(), ruta a un tim_map.json/yaml, o None (se busca
+    junto al .tim; si no hay, conversión genérica de todas las señales y buses).
+    cache: usar/escribir el caché binario <tim>.stim en lugar de parsear siempre.
+    """
+    tim_path = Path(tim_path)
+    out_path = Path(out_path) if out_path else tim_path.with_suffix(DEFAULT_OUT_SUFFIX)
+    if not isinstance(mapping, dict):
+        mapping = load_mapping(mapping or find_mapping(tim_path.parent))
+
+    with stage(profiler, "parse"):
+        if cache:
+            stim = load_stimulus(tim_path, mapping)
+            time_scale, tim_traces = stim.time_scale, stim.traces()
+        else:
+            time_scale, tim_traces = load_tim(tim_path)
+    changes = {}
+    traces = build_traces(time_scale, tim_traces, mapping, profiler, changes)
+    with stage(profiler, "write"):
+        sim_time, timestep = write_cir(out_path, tim_path, traces, time_scale, mapping)
+
+    print(f"Wrote: {out_path}")
+    print(f"Time scale: {time_scale} s  (epsilon={epsilon_for(time_scale)} s)")
+    print(f"Sim time: {sim_time} s  timestep: {timestep} s")
+    if changes:
+        min_pulse = epsilon_for(time_scale) if mapping["min_pulse"] is None else mapping["min_pulse"]
+        print(f"Pulse filter ({mapping['pulse_mode']}, min_pulse={min_pulse} s): {len(changes)} nodos modificados")
+        for node, st in changes.items():
+            print(f" ~ {node}: {st['dropped']} pulsos quitados, {st['stretched']} flancos movidos "
+                  f"(max {st['max_shift']:.3g} s), {st['close']} a menos de epsilon")
+    print(f"Signals (PWL sources) written: {len(traces)}")
+    for (vname, node), (t, _) in traces.items():
+        print(f" - {vname} -> {node} : {len(t)} puntos, ultimo tiempo {t[-1]}")
+    if profiler:
+        profiler.report()
+    return out_path
+
+
+def main(argv=None, default_map=None):
+    ap = argparse.ArgumentParser(description="Convierte un .tim de GTKWave a .cir con fuentes PWL")
+    ap.add_argument("tim", help="archivo .tim")
+    ap.add_argument("out", nargs="?", help="salida .cir (default: <tim>.cir)")
+    ap.add_argument("--map", default=default_map, help="mapeo del diseño (tim_map.json / .yaml)")
+    ap.add_argument("--profile", action="store_true", help="tiempo y memoria por etapa")
+    ap.add_argument("--no-cache", action="store_true", help="no usar ni escribir <tim>.stim")
+    ap.add_argument("--min-pulse", type=float,
+                    help="filtrar pulsos más cortos que esto [s] (default: epsilon; 0 = no filtrar)")
+    ap.add_argument("--pulse-mode", choices=PULSE_MODES, help="quitar (drop) o ensanchar (stretch) los pulsos cortos")
+    ap.add_argument("--probe-current", action="store_true",
+                    help="guardar i(Vvdd) en el .raw (energía por operación con spiceflow.power)")
+    args = ap.parse_args(argv)
+    try:
+        mapping = load_mapping(args.map or find_mapping(Path(args.tim).parent, Path.cwd()))
+    except SpiceflowError as e:
+        raise SystemExit(f"ERROR: {e}")
+    if args.probe_current:
+        mapping["probe_current"] = True
+    if args.min_pulse is not None:
+        mapping["min_pulse"] = args.min_pulse
+    if args.pulse_mode:
+        mapping["pulse_mode"] = args.pulse_mode
+    return convert_tim_to_cir(args.tim, args.out, mapping, StageProfiler() if args.profile else None,
+                              cache=not args.no_cache)
+
+
+if __name__ == "__main__":
+    main()
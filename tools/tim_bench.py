@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+tim_bench.py
+Benchmark del conversor .tim -> .cir (tools/spiceflow) con el mapeo de cada diseño
+(femtoRV_ASIC_Flow/spice/tim_map.json, mult_4_ASIC_Flow/spice/tim_map.json) sobre .tim sintéticos: N señales, M buses de
+ancho W y E flancos por señal/bus. Reporta estadísticas estilo pytest-benchmark
+(min/max/mean/stddev/median/OPS), tiempo por etapa (parse, buses, pwl, write) y pico
+de memoria por etapa (una ronda extra con tracemalloc, que no se cronometra).
+Con --save se guarda una línea base y con --compare se falla (exit 1) si la mediana
+de algún caso empeora más que --threshold.
+Uso:
+  python3 tools/tim_bench.py
+  python3 tools/tim_bench.py --preset femto --rounds 5 --save bench_baseline.json
+  python3 tools/tim_bench.py --compare bench_baseline.json --threshold 0.25
+  python3 tools/tim_bench.py --converter femto --signals 32 --buses 8 --edges 50000 --width 16
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from spiceflow import SpiceflowError, StageProfiler, convert_tim_to_cir, load_mapping, load_stimulus
+
+# ---------- CONFIG ----------
+REPO = Path(__file__).resolve().parents[1]
+MAPPINGS = {
+    "femto": REPO / "femtoRV_ASIC_Flow" / "spice" / "tim_map.json",
+    "mult": REPO / "mult_4_ASIC_Flow" / "spice" / "tim_map.json",
+}
+CLK_PERIOD = 40000        # en unidades de time_scale (40 ns con 1 ps)
+
+# Casos por defecto: el tamaño del .tim de mult_4 y uno del orden de un volcado de femto
+PRESETS = {
+    "mult": {"converter": "mult", "signals": 3, "buses": 2, "edges": 500, "width": 4,
+             "signal_names": ["clk", "rst_n", "init"], "bus_names": ["A[3:0]", "B[3:0]"]},
+    "femto": {"converter": "femto", "signals": 16, "buses": 4, "edges": 20000, "width": 8},
+}
+
+# ---------- GENERADOR .tim ----------
+def make_tim(path, signals, buses, edges, width, time_scale=1e-12, seed=0,
+             signal_names=None, bus_names=None):
+    """
+    Escribe un .tim sintético. La primera señal es un reloj (un flanco cada medio
+    periodo); el resto de señales y los buses cambian en instantes aleatorios
+    alineados a medio periodo, con `edges` flancos cada uno.
+    """
+    rng = random.Random(seed)
+    signal_names = signal_names or ["clk"] + [f"sig{i}" for i in range(1, signals)]
+    bus_names = bus_names or [f"bus{i}[{width - 1}:0]" for i in range(buses)]
+    half = CLK_PERIOD // 2
+    span = edges * 4            # en medios periodos: deja huecos entre flancos
+    digits = (width + 3) // 4
+
+    with open(path, "w") as f:
+        f.write(f"Time_Scale: {time_scale:E}\n\n")
+        for k, name in enumerate(signal_names[:signals]):
+            if k == 0:
+                times = [(i + 1) * half for i in range(edges)]
+            else:
+                times = [t * half for t in sorted(rng.sample(range(1, span), edges))]
+            f.write(f"Digital_Signal\n     Name: {name}\n     Start_State: 0\n")
+            for i, t in enumerate(times):
+                f.write(f"     Edge: {float(t):.1f} {(i + 1) % 2}\n")
+            f.write("\n")
+        for name in bus_names[:buses]:
+            times = sorted(rng.sample(range(1, span), edges))
+            f.write(f"Digital_Bus\n     Name: {name}\n     Start_State: {0:0{digits}X}\n")
+            for t in times:
+                f.write(f"     Edge: {float(t * half):.1f} {rng.getrandbits(width):0{digits}X}\n")
+            f.write("\n")
+    return path
+
+# ---------- BENCH ----------
+def run_once(mapping, tim, cir, memory):
+    profiler = StageProfiler(memory=memory)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        convert_tim_to_cir(tim, cir, mapping, profiler, cache=False)   # medir el parseo real
+    profiler.close()            # tracemalloc no debe quedar activo para las rondas cronometradas
+    return time.perf_counter() - t0, profiler.stages
+
+def bench_case(name, case, rounds=5, warmup=1, workdir=".", memory=True):
+    mapping = load_mapping(MAPPINGS.get(case["converter"], case["converter"]))
+    gen = {k: case[k] for k in ("signals", "buses", "edges", "width")}
+    for k in ("signal_names", "bus_names"):
+        if k in case:
+            gen[k] = case[k]
+    tim = make_tim(Path(workdir) / f"{name}.tim", **gen)
+    cir = Path(workdir) / f"{name}.cir"
+    bad = load_stimulus(tim).check()       # el caché debe dar el valor de cada flanco en su instante
+    if bad:
+        raise SystemExit(f"ERROR: {name}: value_at falla en los flancos de {', '.join(bad)}")
+
+    for _ in range(warmup):
+        run_once(mapping, tim, cir, memory=False)
+    times, per_stage = [], {}
+    for _ in range(rounds):
+        wall, stages = run_once(mapping, tim, cir, memory=False)
+        times.append(wall)
+        for stage, st in stages.items():
+            per_stage.setdefault(stage, []).append(st["time"])
+    mem_stages = run_once(mapping, tim, cir, memory=True)[1] if memory else {}
+
+    total_edges = case["edges"] * (case["signals"] + case["buses"])
+    median = statistics.median(times)
+    return {
+        "case": name,
+        "params": {k: case[k] for k in ("converter", "signals", "buses", "edges", "width")},
+        "tim_bytes": tim.stat().st_size,
+        "cir_bytes": cir.stat().st_size,
+        "rounds": rounds,
+        "min": min(times),
+        "max": max(times),
+        "mean": statistics.mean(times),
+        "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "median": median,
+        "ops": 1.0 / median if median else 0.0,
+        "edges_per_s": total_edges / median if median else 0.0,
+        "stages": {stage: {"median": statistics.median(ts), "peak_bytes": mem_stages.get(stage, {}).get("peak", 0)}
+                   for stage, ts in per_stage.items()},
+    }
+
+# ---------- REPORTE ----------
+def print_results(results):
+    print(f"{'Name':<10} {'Min':>9} {'Max':>9} {'Mean':>9} {'StdDev':>9} {'Median':>9} "
+          f"{'OPS':>8} {'edges/s':>11}")
+    for r in results:
+        print(f"{r['case']:<10} {r['min']:9.4f} {r['max']:9.4f} {r['mean']:9.4f} {r['stddev']:9.4f} "
+              f"{r['median']:9.4f} {r['ops']:8.2f} {r['edges_per_s']:11.0f}")
+    for r in results:
+        print(f"\n{r['case']} ({r['params']}, .tim {r['tim_bytes'] / 2**20:.1f} MiB)")
+        print(f"  {'stage':<8} {'median [s]':>11} {'%':>6} {'peak [MiB]':>11}")
+        total = sum(st["median"] for st in r["stages"].values()) or 1.0
+        for stage, st in r["stages"].items():
+            print(f"  {stage:<8} {st['median']:11.4f} {100 * st['median'] / total:6.1f} "
+                  f"{st['peak_bytes'] / 2**20:11.2f}")
+
+def compare(results, baseline, threshold):
+    """Lista de regresiones (caso, mediana base, mediana actual) por encima de threshold."""
+    base = {r["case"]: r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'Name':<10} {'base [s]':>10} {'now [s]':>10} {'change':>8}")
+    for r in results:
+        if r["case"] not in base:
+            continue
+        b = base[r["case"]]["median"]
+        change = r["median"] / b - 1.0 if b else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{r['case']:<10} {b:10.4f} {r['median']:10.4f} {100 * change:+7.1f}%{flag}")
+        if change > threshold:
+            regressions.append((r["case"], b, r["median"]))
+    return regressions
+
+# ---------- CLI ----------
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Benchmark de la conversión .tim -> .cir")
+    ap.add_argument("--preset", action="append", choices=sorted(PRESETS),
+                    help="casos predefinidos (repetible; default: todos)")
+    ap.add_argument("--converter", help="caso a medida con el mapeo femto, mult o una ruta a tim_map.json")
+    ap.add_argument("--signals", type=int, default=16)
+    ap.add_argument("--buses", type=int, default=4)
+    ap.add_argument("--edges", type=int, default=20000, help="flancos por señal/bus")
+    ap.add_argument("--width", type=int, default=8, help="ancho de los buses")
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--no-memory", action="store_true", help="sin la ronda de tracemalloc (~20x más lenta)")
+    ap.add_argument("--save", help="guardar resultados JSON (línea base)")
+    ap.add_argument("--compare", help="línea base JSON contra la que comparar")
+    ap.add_argument("--threshold", type=float, default=0.25, help="regresión máxima tolerada (0.25 = +25%%)")
+    args = ap.parse_args()
+
+    if args.converter:
+        cases = {"custom": {"converter": args.converter, "signals": args.signals, "buses": args.buses,
+                            "edges": args.edges, "width": args.width}}
+    else:
+        cases = {name: PRESETS[name] for name in (args.preset or PRESETS)}
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="tim_bench_") as tmp:
+            results = [bench_case(name, case, args.rounds, args.warmup, tmp, not args.no_memory)
+                       for name, case in cases.items()]
+    except SpiceflowError as e:
+        raise SystemExit(f"ERROR: {e}")
+    print_results(results)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+        print(f"\nWrote: {args.save}")
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresión(es) por encima de {100 * args.threshold:.0f}%")
+            sys.exit(1)